@@ -0,0 +1,286 @@
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends import locmem
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import metrics
+
+MISSING = object()
+# Ключей в одном запросе IN (...): ниже лимита параметров старых SQLite.
+BATCH = 500
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache_entry ('
+    ' key TEXT NOT NULL UNIQUE, value BLOB NOT NULL, expires REAL)',
+    'CREATE TABLE IF NOT EXISTS cache_tag ('
+    ' tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key)'
+    ') WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_tag_key ON cache_tag (key)',
+    'CREATE TRIGGER IF NOT EXISTS cache_entry_deleted'
+    ' AFTER DELETE ON cache_entry BEGIN'
+    ' DELETE FROM cache_tag WHERE key = old.key; END',
+)
+ALIVE = '(expires IS NULL OR expires > ?)'
+
+
+class InstrumentedCacheMixin:
+    """Считает попадания и промахи кэша для метрик запроса.
+
+    ``get_many`` у LocMemCache устроен как цикл по ``get``, поэтому
+    отдельно не считается; бэкенды со своим ``get_many`` считают сами.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version)
+        if value is MISSING:
+            metrics.cache_lookup(0, 1)
+            return default
+        metrics.cache_lookup(1, 0)
+        return value
+
+
+class LocMemCache(InstrumentedCacheMixin, locmem.LocMemCache):
+    pass
+
+
+def batches(items):
+    items = list(items)
+    for start in range(0, len(items), BATCH):
+        yield items[start:start + BATCH]
+
+
+class SQLiteCache(BaseCache):
+    """Кэш в файле SQLite, общий для всех процессов сервера на машине.
+
+    Записи можно помечать тегами (``set(..., tags=['author:1'])``) и
+    удалять всё под тегом одним вызовом ``invalidate_tags``. Вытеснение
+    как у Django: при переполнении ``MAX_ENTRIES`` удаляется
+    1/``CULL_FREQUENCY`` самых старых записей. Проверка переполнения
+    делается после записи с вероятностью ``CULL_PROBABILITY``. Попадания
+    и промахи ``get`` и ``get_many`` идут в метрики запроса.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = location
+        options = params.get('OPTIONS', {})
+        self.cull_probability = options.get('CULL_PROBABILITY', 0.01)
+        self.busy_timeout = options.get('TIMEOUT', 20)
+        self.local = threading.local()
+
+    @property
+    def db(self):
+        # Соединение своё у каждого потока и у каждого процесса после fork.
+        pid = os.getpid()
+        if getattr(self.local, 'pid', None) != pid:
+            self.local.db = self.connect()
+            self.local.pid = pid
+        return self.local.db
+
+    def connect(self):
+        directory = os.path.dirname(self.location)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(
+            self.location, timeout=self.busy_timeout, isolation_level=None,
+            check_same_thread=False
+        )
+        db.execute('PRAGMA journal_mode = wal')
+        db.execute('PRAGMA synchronous = normal')
+        with self.transaction(db):
+            for sql in SCHEMA:
+                db.execute(sql)
+        return db
+
+    def transaction(self, db=None):
+        return Transaction(db or self.db)
+
+    def tag_key(self, tag):
+        return '%s:tag:%s' % (self.key_prefix, tag)
+
+    def key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        row = self.db.execute(
+            'SELECT value FROM cache_entry WHERE key = ? AND ' + ALIVE,
+            (self.key(key, version), time.time())
+        ).fetchone()
+        if row is None:
+            metrics.cache_lookup(0, 1)
+            return default
+        metrics.cache_lookup(1, 0)
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        made = {self.key(key, version): key for key in keys}
+        found = {}
+        now = time.time()
+        for batch in batches(made):
+            rows = self.db.execute(
+                'SELECT key, value FROM cache_entry WHERE key IN (%s) AND %s'
+                % (', '.join('?' * len(batch)), ALIVE),
+                (*batch, now)
+            )
+            for key, value in rows:
+                found[made[key]] = pickle.loads(value)
+        metrics.cache_lookup(len(found), len(made) - len(found))
+        return found
+
+    def has_key(self, key, version=None):
+        return self.db.execute(
+            'SELECT 1 FROM cache_entry WHERE key = ? AND ' + ALIVE,
+            (self.key(key, version), time.time())
+        ).fetchone() is not None
+
+    def write(self, db, entries, timeout, tags):
+        expires = self.get_backend_timeout(timeout)
+        db.executemany(
+            'INSERT INTO cache_entry (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires',
+            (
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires)
+                for key, value in entries
+            )
+        )
+        keys = [key for key, _ in entries]
+        for batch in batches(keys):
+            db.execute(
+                'DELETE FROM cache_tag WHERE key IN (%s)'
+                % ', '.join('?' * len(batch)),
+                batch
+            )
+        db.executemany(
+            'INSERT OR IGNORE INTO cache_tag (tag, key) VALUES (?, ?)',
+            ((self.tag_key(tag), key) for tag in tags for key in keys)
+        )
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None,
+            tags=()):
+        self.set_many({key: value}, timeout, version, tags)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None,
+                 tags=()):
+        entries = [
+            (self.key(key, version), value) for key, value in data.items()
+        ]
+        with self.transaction() as db:
+            self.write(db, entries, timeout, tags)
+        self.maybe_cull()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None,
+            tags=()):
+        key = self.key(key, version)
+        with self.transaction() as db:
+            exists = db.execute(
+                'SELECT 1 FROM cache_entry WHERE key = ? AND ' + ALIVE,
+                (key, time.time())
+            ).fetchone()
+            if exists:
+                return False
+            self.write(db, [(key, value)], timeout, tags)
+        self.maybe_cull()
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self.key(key, version)
+        with self.transaction() as db:
+            row = db.execute(
+                'SELECT value FROM cache_entry WHERE key = ? AND ' + ALIVE,
+                (key, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            db.execute(
+                'UPDATE cache_entry SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key)
+            )
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.db.execute(
+            'UPDATE cache_entry SET expires = ? WHERE key = ? AND ' + ALIVE,
+            (
+                self.get_backend_timeout(timeout),
+                self.key(key, version),
+                time.time()
+            )
+        ).rowcount > 0
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        made = [self.key(key, version) for key in keys]
+        with self.transaction() as db:
+            for batch in batches(made):
+                db.execute(
+                    'DELETE FROM cache_entry WHERE key IN (%s)'
+                    % ', '.join('?' * len(batch)),
+                    batch
+                )
+
+    def invalidate_tags(self, *tags):
+        """Удаляет все записи с любым из тегов, возвращает их число."""
+        deleted = 0
+        with self.transaction() as db:
+            for batch in batches(self.tag_key(tag) for tag in tags):
+                deleted += db.execute(
+                    'DELETE FROM cache_entry WHERE key IN ('
+                    'SELECT key FROM cache_tag WHERE tag IN (%s))'
+                    % ', '.join('?' * len(batch)),
+                    batch
+                ).rowcount
+        return deleted
+
+    def clear(self):
+        with self.transaction() as db:
+            db.execute('DELETE FROM cache_entry')
+            db.execute('DELETE FROM cache_tag')
+
+    def maybe_cull(self):
+        if random.random() >= self.cull_probability:
+            return
+        with self.transaction() as db:
+            db.execute(
+                'DELETE FROM cache_entry WHERE expires <= ?', (time.time(),)
+            )
+            count = db.execute('SELECT COUNT(*) FROM cache_entry').fetchone()
+            if count[0] <= self._max_entries:
+                return
+            if self._cull_frequency == 0:
+                db.execute('DELETE FROM cache_entry')
+                return
+            db.execute(
+                'DELETE FROM cache_entry WHERE rowid IN ('
+                'SELECT rowid FROM cache_entry ORDER BY rowid LIMIT ?)',
+                (count[0] // self._cull_frequency,)
+            )
+
+    def close(self, **kwargs):
+        # Соединение держится между запросами, как CONN_MAX_AGE у базы.
+        pass
+
+
+class Transaction:
+    """BEGIN IMMEDIATE ... COMMIT: запись без гонок между процессами."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
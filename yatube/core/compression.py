@@ -0,0 +1,133 @@
+import time
+import zlib
+
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+from .staticfiles import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Меньшие ответы сжатие почти не уменьшает, а заголовки gzip их раздувают.
+MIN_SIZE = 200
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+# Уровни для ответов, сжимаемых на каждый запрос. По bench_compression
+# gzip 9 не меньше gzip 6 на страницах постов, но медленнее; brotli 11
+# оставлен заранее сжатой статике (core.staticfiles).
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+class GzipCompressor:
+    encoding = 'gzip'
+
+    def __init__(self, level=GZIP_LEVEL):
+        # wbits=31: формат gzip с заголовком и контрольной суммой.
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, chunk):
+        # Сброс после каждого куска: клиент получает его сразу.
+        return (
+            self.compressor.compress(chunk)
+            + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        )
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    encoding = 'br'
+
+    def __init__(self, quality=BROTLI_QUALITY):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def process(self, chunk):
+        return self.compressor.process(chunk) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def compressors():
+    """Доступные кодировки в порядке предпочтения."""
+    if brotli is not None:
+        return (BrotliCompressor, GzipCompressor)
+    return (GzipCompressor,)
+
+
+def compress(compressor, content):
+    """Сжимает ответ целиком одним вызовом."""
+    return compressor.process(content) + compressor.finish()
+
+
+def compress_stream(compressor, chunks):
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def compressible(response):
+    if (
+        response.has_header('Content-Encoding')
+        or response.status_code == 206
+        or response.has_header('X-Accel-Redirect')
+        or response.has_header('X-Sendfile')
+    ):
+        return False
+    content_type = response.get('Content-Type', '')
+    if not content_type.startswith(COMPRESSIBLE_TYPES):
+        return False
+    return response.streaming or len(response.content) >= MIN_SIZE
+
+
+def compress_response(request, response):
+    """Сжимает ответ кодировкой, которую принимает клиент.
+
+    Потоковые ответы сжимаются по кускам без буферизации всего тела.
+    Сильный ETag становится слабым: байты ответа уже другие, но
+    страница та же, и условные запросы по нему продолжают работать.
+    """
+    if not compressible(response):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    for compressor_class in compressors():
+        if compressor_class.encoding in accepted:
+            break
+    else:
+        return response
+    compressor = compressor_class()
+    if response.streaming:
+        response.streaming_content = compress_stream(
+            compressor, response.streaming_content
+        )
+        if response.has_header('Content-Length'):
+            del response['Content-Length']
+    else:
+        start = time.perf_counter()
+        content = response.content
+        compressed = compress(compressor, content)
+        metrics.compression(
+            len(content), len(compressed), time.perf_counter() - start
+        )
+        if len(compressed) >= len(content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    response['Content-Encoding'] = compressor.encoding
+    return response
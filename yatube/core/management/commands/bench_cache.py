@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand
+
+from core.cache import LocMemCache, SQLiteCache
+
+PAYLOAD = 'x' * 2048
+
+
+def make_cache(backend, location):
+    options = {'OPTIONS': {'MAX_ENTRIES': 1000000}}
+    if backend == 'sqlite':
+        return SQLiteCache(location, options)
+    return LocMemCache('bench-cache', options)
+
+
+def worker(args):
+    """Поток запросов одного процесса: промах стоит render_ms работы CPU."""
+    backend, location, seed, keys, skew, seconds, render_ms = args
+    cache = make_cache(backend, location)
+    rng = random.Random(seed)
+    weights = list(accumulate(1 / (rank + 1) ** skew for rank in range(keys)))
+    population = range(keys)
+    requests = hits = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        key = 'page:%s' % rng.choices(population, cum_weights=weights)[0]
+        if cache.get(key) is None:
+            rendered = time.perf_counter() + render_ms / 1000
+            while time.perf_counter() < rendered:
+                pass
+            cache.set(key, PAYLOAD, None)
+        else:
+            hits += 1
+        requests += 1
+    return requests, hits
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает LocMemCache (кэш в каждом процессе) и общий SQLiteCache '
+        'на нескольких процессах: запросов в секунду и доля попаданий, '
+        'когда промах стоит отрисовки страницы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, nargs='+', default=[1, 2, 4, 8]
+        )
+        parser.add_argument('--seconds', type=float, default=3)
+        parser.add_argument('--keys', type=int, default=5000)
+        parser.add_argument('--skew', type=float, default=1.0)
+        parser.add_argument(
+            '--render-ms', type=float, default=2,
+            help='Цена промаха: столько миллисекунд занят процессор.'
+        )
+
+    def run(self, backend, processes, options, directory):
+        location = os.path.join(directory, 'cache.sqlite3')
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(processes) as pool:
+            results = pool.map(worker, [
+                (
+                    backend, location, seed, options['keys'],
+                    options['skew'], options['seconds'],
+                    options['render_ms']
+                ) for seed in range(processes)
+            ])
+        requests = sum(result[0] for result in results)
+        hits = sum(result[1] for result in results)
+        return requests / options['seconds'], hits / max(requests, 1)
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp(prefix='bench-cache-')
+        try:
+            self.stdout.write('%9s %8s %12s %9s' % (
+                'processes', 'backend', 'requests/s', 'hit rate'
+            ))
+            for processes in options['processes']:
+                for backend in ('locmem', 'sqlite'):
+                    rate, hit_rate = self.run(
+                        backend, processes, options, directory
+                    )
+                    self.stdout.write('%9s %8s %12.0f %8.1f%%' % (
+                        processes, backend, rate, hit_rate * 100
+                    ))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,185 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+
+from core.metrics import percentile
+from core.sqlite import is_locked, retry_locked
+from posts.models import Comment, Post, User
+
+MS = 1000
+TEMPLATE = 'bench_template'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite с настройками Django по '
+        'умолчанию и с профилем из settings (WAL, PRAGMA, постоянные '
+        'соединения, повтор записи) на смешанной нагрузке из нескольких '
+        'потоков. Работает на временных копиях базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument(
+            '--writes', type=float, default=0.2,
+            help='Доля запросов на запись.'
+        )
+        parser.add_argument('--posts', type=int, default=5000)
+
+    def profiles(self, directory):
+        tuned = settings.DATABASES['default']
+        return {
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': os.path.join(directory, 'default.sqlite3'),
+            },
+            'tuned': {
+                **tuned,
+                'NAME': os.path.join(directory, 'tuned.sqlite3'),
+            },
+        }
+
+    def register(self, alias, settings_dict):
+        connections.databases[alias] = settings_dict
+        connections.ensure_defaults(alias)
+        connections.prepare_test_settings(alias)
+
+    def unregister(self, alias):
+        connections[alias].close()
+        del connections[alias]
+        del connections.databases[alias]
+
+    def fill(self, posts):
+        call_command('migrate', database=TEMPLATE, verbosity=0)
+        # bulk_create не шлёт сигналы, которые пишут в основную базу.
+        User.objects.using(TEMPLATE).bulk_create(
+            User(username='bench-sqlite-%s' % i) for i in range(20)
+        )
+        authors = list(User.objects.using(TEMPLATE).all())
+        rng = random.Random(0)
+        Post.objects.using(TEMPLATE).bulk_create(
+            (
+                Post(text='bench', author=rng.choice(authors))
+                for _ in range(posts)
+            ),
+            batch_size=500
+        )
+        return (
+            [author.id for author in authors],
+            list(
+                Post.objects.using(TEMPLATE).values_list('id', flat=True)
+            )
+        )
+
+    def read(self, alias, post_id):
+        list(
+            Post.objects.using(alias).select_related(
+                'author', 'group'
+            ).order_by('-pub_date', '-id')[:10]
+        )
+        list(Comment.objects.using(alias).filter(post_id=post_id)[:20])
+
+    def write(self, alias, post_id, author_id):
+        # Как add_comment: транзакция начинается с чтения.
+        with transaction.atomic(using=alias):
+            post = Post.objects.using(alias).get(pk=post_id)
+            Comment.objects.using(alias).bulk_create([
+                Comment(post=post, author_id=author_id, text='bench')
+            ])
+            Post.objects.using(alias).filter(pk=post_id).update(
+                comments_count=F('comments_count') + 1
+            )
+
+    def worker(self, alias, write, options, ids, deadline, seed, results):
+        rng = random.Random(seed)
+        author_ids, post_ids = ids
+        latencies, errors = {'read': [], 'write': []}, 0
+        try:
+            while time.perf_counter() < deadline:
+                kind = 'write' if rng.random() < options['writes'] else 'read'
+                post_id = rng.choice(post_ids)
+                start = time.perf_counter()
+                try:
+                    if kind == 'write':
+                        write(alias, post_id, rng.choice(author_ids))
+                    else:
+                        self.read(alias, post_id)
+                except OperationalError as error:
+                    if not is_locked(error):
+                        raise
+                    errors += 1
+                else:
+                    latencies[kind].append(time.perf_counter() - start)
+                # Конец "запроса": как по сигналу request_finished.
+                connections[alias].close_if_unusable_or_obsolete()
+        finally:
+            connections.close_all()
+        results.append((latencies, errors))
+
+    def run(self, alias, write, options, ids):
+        results = []
+        deadline = time.perf_counter() + options['seconds']
+        threads = [
+            threading.Thread(
+                target=self.worker,
+                args=(alias, write, options, ids, deadline, seed, results)
+            ) for seed in range(options['threads'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        reads = [value for item, _ in results for value in item['read']]
+        writes = [value for item, _ in results for value in item['write']]
+        return reads, writes, sum(errors for _, errors in results)
+
+    def percentile(self, values, share):
+        return percentile(values, share) * MS if values else 0
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp(prefix='bench-sqlite-')
+        profiles = self.profiles(directory)
+        template = os.path.join(directory, 'template.sqlite3')
+        try:
+            self.register(TEMPLATE, {
+                'ENGINE': 'django.db.backends.sqlite3', 'NAME': template,
+            })
+            ids = self.fill(options['posts'])
+            self.unregister(TEMPLATE)
+            self.stdout.write(
+                '%-8s %10s %10s %10s %10s %8s' % (
+                    'profile', 'reads/s', 'writes/s',
+                    'read p95', 'write p95', 'locked'
+                )
+            )
+            for name, settings_dict in profiles.items():
+                alias = 'bench_%s' % name
+                write = self.write
+                if name == 'tuned':
+                    write = retry_locked(self.write, using=alias)
+                shutil.copy(template, settings_dict['NAME'])
+                self.register(alias, settings_dict)
+                reads, writes, errors = self.run(alias, write, options, ids)
+                self.unregister(alias)
+                self.stdout.write(
+                    '%-8s %10.0f %10.0f %8.2fms %8.2fms %8s' % (
+                        name,
+                        len(reads) / options['seconds'],
+                        len(writes) / options['seconds'],
+                        self.percentile(reads, 95),
+                        self.percentile(writes, 95),
+                        errors
+                    )
+                )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
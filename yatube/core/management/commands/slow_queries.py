@@ -0,0 +1,86 @@
+import glob
+import json
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SORTS = {
+    'total': lambda group: sum(group['durations']),
+    'count': lambda group: len(group['durations']),
+    'max': lambda group: max(group['durations']),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка журнала медленных запросов по отпечаткам SQL: число, '
+        'суммарное, среднее и максимальное время, представления и план.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=settings.SLOW_QUERY_LOG,
+            help='Журнал; ротированные файлы path.N читаются тоже.'
+        )
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--sort', choices=SORTS, default='total')
+
+    def read(self, path):
+        paths = sorted(glob.glob(glob.escape(path) + '.*'), reverse=True)
+        paths.append(path)
+        for name in paths:
+            try:
+                with open(name, encoding='utf-8') as file:
+                    for line in file:
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            continue
+            except FileNotFoundError:
+                continue
+
+    def group(self, records):
+        groups = {}
+        for record in records:
+            group = groups.setdefault(record['fingerprint'], {
+                'durations': [], 'views': {}, 'callers': {},
+            })
+            group['durations'].append(record['duration_ms'])
+            for key, value in (
+                ('views', record['view']), ('callers', record['caller'])
+            ):
+                group[key][value] = group[key].get(value, 0) + 1
+            # Остаётся последний план: он соответствует текущей схеме.
+            group['plan'] = record['plan']
+        return groups
+
+    def top(self, counts):
+        return ', '.join(
+            '%s (%s)' % (name, count) for name, count in sorted(
+                counts.items(), key=lambda item: -item[1]
+            )[:3]
+        )
+
+    def handle(self, *args, **options):
+        groups = self.group(self.read(options['path']))
+        if not groups:
+            raise CommandError('Журнал %s пуст.' % options['path'])
+        ranked = sorted(
+            groups.items(), key=lambda item: -SORTS[options['sort']](item[1])
+        )
+        for fingerprint, group in ranked[:options['top']]:
+            durations = group['durations']
+            self.stdout.write(self.style.SQL_KEYWORD(fingerprint))
+            self.stdout.write(
+                '  запросов %s, всего %.1f мс, среднее %.1f мс, '
+                'максимум %.1f мс' % (
+                    len(durations), sum(durations),
+                    statistics.mean(durations), max(durations)
+                )
+            )
+            self.stdout.write('  представления: %s' % self.top(group['views']))
+            self.stdout.write('  код: %s' % self.top(group['callers']))
+            for step in group['plan'] or ():
+                self.stdout.write('  план: %s' % step)
+            self.stdout.write('')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core import replication, routers
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite в файлы реплик.'
+
+    def handle(self, *args, **options):
+        for alias in routers.replicas():
+            replication.sync(alias)
+            self.stdout.write(
+                self.style.SUCCESS('Реплика %s обновлена' % alias)
+            )
@@ -0,0 +1,159 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class ChunkedFileResponse(FileResponse):
+    block_size = CHUNK_SIZE
+
+
+class RangeFile:
+    """Файл, из которого читается только диапазон байт."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def resolve(path):
+    """Абсолютный путь к файлу, который разрешено отдавать, или Http404.
+
+    Отдаются только файлы из каталогов ``MEDIA_PUBLIC_DIRS`` внутри
+    MEDIA_ROOT, без выхода за него и без скрытых файлов.
+    """
+    parts = path.split('/')
+    if (
+        parts[0] not in settings.MEDIA_PUBLIC_DIRS
+        or any(not part or part.startswith('.') for part in parts)
+    ):
+        raise Http404
+    root = os.path.realpath(settings.MEDIA_ROOT)
+    file_path = os.path.realpath(os.path.join(root, *parts))
+    if not file_path.startswith(root + os.sep) or not os.path.isfile(
+        file_path
+    ):
+        raise Http404
+    return file_path
+
+
+def parse_range(header, size):
+    """Диапазон из заголовка Range как (начало, конец) включительно.
+
+    None - отдать файл целиком: заголовка нет, он нераспознан или
+    просит несколько диапазонов. ValueError - диапазон вне файла.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        length = int(end)
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if end and start > int(end):
+        return None
+    if start >= size:
+        raise ValueError(header)
+    return start, min(int(end), size - 1) if end else size - 1
+
+
+def sendfile(file_path, content_type):
+    """Ответ без тела: файл отдаёт фронтенд-сервер по заголовку."""
+    response = HttpResponse(content_type=content_type)
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header == 'X-Accel-Redirect':
+        relative = os.path.relpath(
+            file_path, os.path.realpath(settings.MEDIA_ROOT)
+        )
+        response[header] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(
+            relative.replace(os.sep, '/')
+        )
+    else:
+        response[header] = file_path
+    return response
+
+
+def stream(request, file_path, size, etag, last_modified, content_type):
+    """Файл или запрошенный диапазон кусками по CHUNK_SIZE байт."""
+    header = request.META.get('HTTP_RANGE', '')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range not in (etag, http_date(last_modified)):
+        # Файл сменился с прошлой загрузки: докачка не годится.
+        header = ''
+    try:
+        byte_range = parse_range(header, size) if header else None
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = 'bytes */%s' % size
+        return response
+    if byte_range is None:
+        return ChunkedFileResponse(
+            open(file_path, 'rb'), content_type=content_type
+        )
+    start, end = byte_range
+    response = ChunkedFileResponse(
+        RangeFile(open(file_path, 'rb'), start, end - start + 1),
+        status=206,
+        content_type=content_type
+    )
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = 'bytes %s-%s/%s' % (start, end, size)
+    return response
+
+
+def serve(request, path):
+    """Отдаёт загруженный файл с поддержкой Range и условных запросов.
+
+    Если задан ``MEDIA_SENDFILE_HEADER``, передачу файла, включая
+    диапазоны, берёт на себя фронтенд-сервер. Иначе файл читается
+    кусками, и память на загрузку не растёт с размером файла.
+    """
+    file_path = resolve(path)
+    stat = os.stat(file_path)
+    last_modified = int(stat.st_mtime)
+    etag = quote_etag('%x-%x' % (last_modified, stat.st_size))
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        content_type = (
+            mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        )
+        if settings.MEDIA_SENDFILE_HEADER:
+            response = sendfile(file_path, content_type)
+        else:
+            response = stream(
+                request, file_path, stat.st_size, etag, last_modified,
+                content_type
+            )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'public, max-age=%s' % (
+        settings.MEDIA_CACHE_SECONDS
+    )
+    response['Accept-Ranges'] = 'bytes'
+    # Загруженный файл не должен исполниться как HTML или скрипт.
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
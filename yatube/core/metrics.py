@@ -0,0 +1,229 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+PREFIX = 'yatube_'
+
+DURATION_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+# Имя метрики -> (тип, границы корзин, описание).
+METRICS = {
+    'request_duration_seconds': (
+        'histogram', DURATION_BUCKETS, 'Время обработки запроса.'
+    ),
+    'db_queries': (
+        'histogram', COUNT_BUCKETS, 'Число SQL-запросов на запрос.'
+    ),
+    'db_duration_seconds': (
+        'histogram', DURATION_BUCKETS, 'Время SQL-запросов на запрос.'
+    ),
+    'template_duration_seconds': (
+        'histogram', DURATION_BUCKETS, 'Время рендеринга шаблонов.'
+    ),
+    'cache_hits_total': ('counter', None, 'Попадания в кэш.'),
+    'cache_misses_total': ('counter', None, 'Промахи кэша.'),
+    'compression_input_bytes_total': (
+        'counter', None, 'Байт ответов до сжатия.'
+    ),
+    'compression_output_bytes_total': (
+        'counter', None, 'Байт ответов после сжатия.'
+    ),
+}
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Замеры одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.compress_in = 0
+        self.compress_out = 0
+        self.compress_time = 0.0
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper: считает каждый SQL-запрос.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - start
+
+    def server_timing(self, total):
+        parts = [
+            'db;dur=%.1f;desc="%s queries"' % (
+                self.db_time * 1000, self.db_queries
+            ),
+            'tpl;dur=%.1f' % (self.template_time * 1000),
+            'cache;desc="%s hits, %s misses"' % (
+                self.cache_hits, self.cache_misses
+            ),
+        ]
+        if self.compress_in:
+            parts.append('compress;dur=%.1f;desc="%s -> %s bytes"' % (
+                self.compress_time * 1000, self.compress_in,
+                self.compress_out
+            ))
+        parts.append('total;dur=%.1f' % (total * 1000))
+        return ', '.join(parts)
+
+
+def start():
+    _local.current = RequestMetrics()
+    return _local.current
+
+
+def stop():
+    _local.current = None
+
+
+def current():
+    return getattr(_local, 'current', None)
+
+
+@contextmanager
+def template_timer():
+    """Учитывает только внешний рендеринг: вложенный уже внутри него."""
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    metrics.template_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.template_depth -= 1
+        if not metrics.template_depth:
+            metrics.template_time += time.perf_counter() - start
+
+
+def cache_lookup(hits, misses):
+    metrics = current()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+def compression(size, compressed, elapsed):
+    metrics = current()
+    if metrics is not None:
+        metrics.compress_in += size
+        metrics.compress_out += compressed
+        metrics.compress_time += elapsed
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class Registry:
+    """Гистограммы и счётчики по представлениям в памяти процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def record(self, view, metrics, total):
+        observed = {
+            'request_duration_seconds': total,
+            'db_queries': metrics.db_queries,
+            'db_duration_seconds': metrics.db_time,
+            'template_duration_seconds': metrics.template_time,
+            'cache_hits_total': metrics.cache_hits,
+            'cache_misses_total': metrics.cache_misses,
+            'compression_input_bytes_total': metrics.compress_in,
+            'compression_output_bytes_total': metrics.compress_out,
+        }
+        with self.lock:
+            for name, value in observed.items():
+                kind, buckets, _ = METRICS[name]
+                key = (name, view)
+                if kind == 'counter':
+                    self.values[key] = self.values.get(key, 0) + value
+                    continue
+                if key not in self.values:
+                    self.values[key] = Histogram(buckets)
+                self.values[key].observe(value)
+
+    def render(self):
+        """Текстовый формат Prometheus."""
+        with self.lock:
+            items = sorted(self.values.items())
+            lines = []
+            for name, (kind, _, description) in METRICS.items():
+                lines.append('# HELP %s%s %s' % (PREFIX, name, description))
+                lines.append('# TYPE %s%s %s' % (PREFIX, name, kind))
+                for (metric, view), value in items:
+                    if metric != name:
+                        continue
+                    label = 'view="%s"' % escape(view)
+                    if kind == 'counter':
+                        lines.append(
+                            '%s%s{%s} %s' % (PREFIX, name, label, value)
+                        )
+                        continue
+                    lines.extend(histogram_lines(name, label, value))
+        return '\n'.join(lines) + '\n'
+
+
+def histogram_lines(name, label, histogram):
+    total = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        total += count
+        yield '%s%s_bucket{%s,le="%s"} %s' % (
+            PREFIX, name, label, bound, total
+        )
+    yield '%s%s_bucket{%s,le="+Inf"} %s' % (
+        PREFIX, name, label, histogram.count
+    )
+    yield '%s%s_sum{%s} %s' % (PREFIX, name, label, histogram.sum)
+    yield '%s%s_count{%s} %s' % (PREFIX, name, label, histogram.count)
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n'
+    )
+
+
+registry = Registry()
+
+
+def percentile(values, share):
+    """Процентиль ``share`` (0-100) с линейной интерполяцией.
+
+    Совпадает со ``statistics.quantiles(method='inclusive')``, которого
+    нет в Python 3.7.
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * share / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
@@ -0,0 +1,114 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import compression, metrics, routers
+from .slow_queries import SlowQueryLog
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class ReplicaPinMiddleware:
+    """Read-your-writes для чтения с реплик.
+
+    Запросы с изменяющими методами и представления с
+    ``routers.pin_primary`` работают с основной базой и ставят cookie, по
+    которой следующие ``REPLICA_PIN_SECONDS`` секунд чтение этого клиента
+    тоже идёт на основную базу.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writing = request.method not in SAFE_METHODS
+        was_pinned = routers.is_pinned()
+        if writing or self.pinned(request):
+            routers.pin()
+        try:
+            response = self.get_response(request)
+        finally:
+            if not was_pinned:
+                routers.unpin()
+        if writing or getattr(request, 'pins_primary', False):
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                str(routers.pin_expires()),
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+    def pinned(self, request):
+        try:
+            expires = int(request.COOKIES[settings.REPLICA_PIN_COOKIE])
+        except (KeyError, ValueError):
+            return False
+        return expires > time.time()
+
+
+class MetricsMiddleware:
+    """Замеры запроса: SQL, шаблоны, кэш и общее время.
+
+    Итоги уходят в заголовок Server-Timing и в гистограммы по имени
+    представления, которые отдаёт ``core.views.metrics``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        measured = metrics.start()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(measured)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.stop()
+        total = measured.elapsed()
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.registry.record(view, measured, total)
+        response['Server-Timing'] = measured.server_timing(total)
+        return response
+
+
+class SlowQueryMiddleware:
+    """Журнал запросов дольше ``SLOW_QUERY_THRESHOLD`` секунд."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.SLOW_QUERY_THRESHOLD
+        if threshold is None:
+            return self.get_response(request)
+        wrapper = SlowQueryLog(request, threshold)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(wrapper)
+                )
+            return self.get_response(request)
+
+
+class CompressionMiddleware:
+    """Сжатие ответов brotli или gzip, см. ``core.compression``.
+
+    Стоит ниже MetricsMiddleware: время и размеры сжатия попадают
+    в Server-Timing, а ETag представлений уже выставлен.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return compression.compress_response(
+            request, self.get_response(request)
+        )
@@ -0,0 +1,11 @@
+from django.db import connections
+
+from . import routers
+
+
+def sync(alias):
+    """Копирует основную базу SQLite в реплику ``alias``."""
+    source, target = connections[routers.PRIMARY], connections[alias]
+    source.ensure_connection()
+    target.ensure_connection()
+    source.connection.backup(target.connection)
@@ -0,0 +1,106 @@
+import contextlib
+import functools
+import random
+import threading
+import time
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+_state = threading.local()
+
+
+def pin():
+    """Направляет чтение текущего потока на основную базу."""
+    _state.pinned = True
+
+
+def unpin():
+    _state.pinned = False
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+@contextlib.contextmanager
+def pinned():
+    """Чтение внутри блока идёт на основную базу.
+
+    Годится и как декоратор, например для ``handle`` команд, которые
+    читают то, что только что записали.
+    """
+    was_pinned = is_pinned()
+    pin()
+    try:
+        yield
+    finally:
+        _state.pinned = was_pinned
+
+
+def reads_replica():
+    """Читает ли текущий поток с реплики, которая может отставать."""
+    return bool(replicas()) and not is_pinned()
+
+
+def pin_primary(view):
+    """Закрепляет за основной базой представление, пишущее и на GET.
+
+    ReplicaPinMiddleware ставит после него cookie закрепления так же,
+    как после POST.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        pin()
+        request.pins_primary = True
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def pin_expires():
+    """Момент, до которого чтение пользователя остаётся на основной базе."""
+    return int(time.time()) + settings.REPLICA_PIN_SECONDS
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+class PrimaryReplicaRouter:
+    """Чтение с реплик, запись на основную базу.
+
+    Пока поток закреплён за основной базой (см. ``pin``), чтение тоже
+    идёт на неё: так пользователь сразу видит свои изменения, не дожидаясь
+    репликации. Базы, не упомянутые в настройках реплик, маршрутизатор
+    не трогает.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        aliases = replicas()
+        if not aliases or is_pinned():
+            return PRIMARY
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db not in (
+            None, PRIMARY, *replicas()
+        ):
+            # Объекты посторонних баз (например, из бенчмарков) остаются
+            # в своей базе.
+            return instance._state.db
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {PRIMARY, *replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема реплик совпадает со схемой основной базы.
+        return True
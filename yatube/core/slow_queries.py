@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import re
+import time
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.backends.sqlite3.base import SQLiteCursorWrapper
+
+logger = logging.getLogger('yatube.slow_queries')
+
+EXPLAINED = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+# Обёртки запросов из core: сами они запросов не делают.
+SKIPPED_FILES = tuple(
+    os.path.join('core', name)
+    for name in ('slow_queries.py', 'metrics.py', 'middleware.py')
+)
+
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    """SQL без литералов и параметров: одинаковый у запросов одной формы."""
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def caller():
+    """Последний кадр стека из кода проекта, вызвавший запрос."""
+    for frame in reversed(traceback.extract_stack()):
+        if not frame.filename.startswith(settings.BASE_DIR):
+            continue
+        if frame.filename.endswith(SKIPPED_FILES):
+            continue
+        return '%s:%s in %s: %s' % (
+            os.path.relpath(frame.filename, settings.BASE_DIR),
+            frame.lineno, frame.name, frame.line
+        )
+    return None
+
+
+def explain(connection, sql, params):
+    """EXPLAIN QUERY PLAN мимо execute_wrapper, чтобы не попасть в замеры."""
+    if connection.vendor != 'sqlite' or (
+        not sql.lstrip().upper().startswith(EXPLAINED)
+    ):
+        return None
+    cursor = connection.connection.cursor(factory=SQLiteCursorWrapper)
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+    except DatabaseError as error:
+        return ['не удалось: %s' % error]
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """execute_wrapper, пишущий запросы дольше порога в журнал.
+
+    Запись - строка JSON: время, SQL, параметры, отпечаток запроса,
+    представление, строка кода и план запроса в SQLite. Параметры
+    пишутся, только если включён ``SLOW_QUERY_LOG_PARAMS``.
+    """
+
+    def __init__(self, request, threshold):
+        self.request = request
+        self.threshold = threshold
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                self.log(sql, params, many, context, duration)
+
+    def view(self):
+        match = self.request.resolver_match
+        return match.view_name if match else None
+
+    def log(self, sql, params, many, context, duration):
+        connection = context['connection']
+        logger.warning(json.dumps({
+            'time': time.time(),
+            'duration_ms': round(duration * 1000, 3),
+            'database': connection.alias,
+            'view': self.view(),
+            'path': self.request.path,
+            'sql': sql,
+            'params': (
+                None if many or not settings.SLOW_QUERY_LOG_PARAMS
+                else params
+            ),
+            'fingerprint': fingerprint(sql),
+            'caller': caller(),
+            'plan': None if many else explain(connection, sql, params),
+        }, ensure_ascii=False, default=str))
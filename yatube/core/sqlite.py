@@ -0,0 +1,60 @@
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+LOCKED_MESSAGES = ('database is locked', 'database table is locked')
+
+
+def configure(sender, connection, **kwargs):
+    """Выполняет PRAGMA из настройки PRAGMAS базы на новом соединении."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute('PRAGMA %s = %s' % (name, value))
+
+
+def is_locked(error):
+    return any(message in str(error) for message in LOCKED_MESSAGES)
+
+
+def retry_locked(function=None, using=DEFAULT_DB_ALIAS):
+    """Повторяет транзакцию, упавшую с ``database is locked``.
+
+    busy_timeout не помогает, когда транзакция в WAL начинала с чтения, а
+    другой писатель успел зафиксировать изменения: SQLite сразу отвечает
+    SQLITE_BUSY. Такую транзакцию можно только начать заново, поэтому
+    декоратор ставится снаружи ``transaction.atomic`` и ничего не повторяет
+    внутри чужой транзакции.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            attempts = settings.DB_WRITE_RETRIES
+            for attempt in range(attempts + 1):
+                try:
+                    return view(*args, **kwargs)
+                except OperationalError as error:
+                    if (
+                        attempt == attempts
+                        or not is_locked(error)
+                        or connections[using].in_atomic_block
+                    ):
+                        raise
+                delay = settings.DB_WRITE_RETRY_DELAY * 2 ** attempt
+                logger.info(
+                    'База заблокирована, повтор %s через %.3f с',
+                    attempt + 1, delay
+                )
+                time.sleep(delay * random.uniform(0.5, 1.5))
+        return wrapper
+    if function is not None:
+        return decorator(function)
+    return decorator
@@ -0,0 +1,173 @@
+import gzip
+import mimetypes
+import os
+from email.utils import formatdate
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage,
+    staticfiles_storage,
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Сжимаются только текстовые форматы: картинки и шрифты уже сжаты.
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.ico', '.json', '.txt')
+MIN_SIZE = 256
+# Кодировка ответа -> расширение заранее сжатого файла, по предпочтению.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Файлы без хэша в имени могут смениться по тому же адресу.
+SHORT_CACHE = 'public, max-age=300'
+CHUNK_SIZE = 64 * 1024
+
+
+def compress(path):
+    """Пишет рядом с файлом .gz и .br, если они меньше исходного.
+
+    Возвращает пути созданных файлов.
+    """
+    with open(path, 'rb') as source:
+        content = source.read()
+    if len(content) < MIN_SIZE:
+        return []
+    variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(content)))
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) >= len(content):
+            continue
+        with open(path + suffix, 'wb') as target:
+            target.write(compressed)
+        written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хэшем содержимого в имени и сжатыми копиями.
+
+    ``collectstatic`` записывает манифест имён и кладёт рядом с каждым
+    текстовым файлом варианты .gz и .br (brotli - если установлен пакет
+    Brotli). Без манифеста, например до первого ``collectstatic``,
+    адреса строятся по исходным именам, а не падают с ValueError.
+    """
+
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if not name.endswith(COMPRESSIBLE):
+                continue
+            for path in compress(self.path(name)):
+                yield name, os.path.relpath(path, self.location), True
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме отключённых через q=0."""
+    encodings = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(coding.strip().lower())
+    return encodings
+
+
+def read_chunks(path):
+    with open(path, 'rb') as file:
+        yield from iter(lambda: file.read(CHUNK_SIZE), b'')
+
+
+class StaticFilesApplication:
+    """WSGI-обёртка, отдающая файлы ``STATIC_ROOT`` мимо Django.
+
+    Клиенту отдаётся заранее сжатый вариант по Accept-Encoding с
+    Content-Encoding и Vary. Файлы из манифеста кэшируются на год как
+    неизменяемые, остальные - ненадолго. Остальные запросы и
+    отсутствующие файлы уходят в приложение Django.
+    """
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = os.path.realpath(root or settings.STATIC_ROOT)
+        self.prefix = prefix or settings.STATIC_URL
+        self.immutable = frozenset(
+            getattr(staticfiles_storage, 'hashed_files', {}).values()
+        )
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if (
+            not path.startswith(self.prefix)
+            or environ['REQUEST_METHOD'] not in ('GET', 'HEAD')
+        ):
+            return self.application(environ, start_response)
+        name = path[len(self.prefix):]
+        file_path = os.path.realpath(os.path.join(self.root, name))
+        if (
+            not file_path.startswith(self.root + os.sep)
+            or not os.path.isfile(file_path)
+        ):
+            return self.application(environ, start_response)
+        return self.serve(environ, start_response, name, file_path)
+
+    def variant(self, environ, file_path):
+        accepted = accepted_encodings(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(file_path + suffix):
+                return encoding, file_path + suffix
+        return None, file_path
+
+    def serve(self, environ, start_response, name, file_path):
+        encoding, served = self.variant(environ, file_path)
+        stat = os.stat(served)
+        etag = '"%x-%x%s"' % (
+            int(stat.st_mtime), stat.st_size,
+            '-' + encoding if encoding else ''
+        )
+        headers = [
+            ('Cache-Control', (
+                IMMUTABLE if name in self.immutable else SHORT_CACHE
+            )),
+            ('ETag', etag),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+        ]
+        if name.endswith(COMPRESSIBLE):
+            headers.append(('Vary', 'Accept-Encoding'))
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')]:
+            start_response('304 Not Modified', headers)
+            return []
+        content_type, _ = mimetypes.guess_type(file_path)
+        headers += [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Content-Length', str(stat.st_size)),
+        ]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            # Сервер может отдать файл через sendfile().
+            return file_wrapper(open(served, 'rb'), CHUNK_SIZE)
+        return read_chunks(served)
@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class CacheClearingMixin:
+    def startTest(self, test):
+        # Тестовая база откатывается вместе с последовательностями id,
+        # а кэш нет: без очистки тест может получить страницу или метку
+        # версии объекта с тем же id из предыдущего теста.
+        for cache in caches.all():
+            cache.clear()
+        super().startTest(test)
+
+
+class CacheClearingRunner(DiscoverRunner):
+    """Запуск тестов с чистым кэшем перед каждым тестом.
+
+    Файловые кэши на время тестов переносятся во временный каталог,
+    чтобы не задеть кэш запущенного сервера.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='yatube-test-cache-')
+        self.cache_settings = override_settings(CACHES={
+            alias: {
+                **config,
+                'LOCATION': os.path.join(self.cache_dir, alias + '.sqlite3'),
+            } if 'LOCATION' in config else config
+            for alias, config in settings.CACHES.items()
+        })
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
+
+    def get_resultclass(self):
+        result = super().get_resultclass() or unittest.TextTestResult
+        return type(
+            'CacheClearing' + result.__name__,
+            (CacheClearingMixin, result),
+            {}
+        )
@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+
+def set_in_child(location):
+    SQLiteCache(location, {}).set('from-child', 42, tags=['child'])
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {})
+
+    def test_get_set(self):
+        values = {'str': 'значение', 'dict': {'a': [1, 2]}, 'none': None}
+        for key, value in values.items():
+            with self.subTest(key=key):
+                self.cache.set(key, value)
+                self.assertEqual(self.cache.get(key, 'нет'), value)
+        self.assertEqual(self.cache.get('missing', 'нет'), 'нет')
+        self.assertEqual(
+            self.cache.get_many(['str', 'missing', 'none']),
+            {'str': 'значение', 'none': None}
+        )
+
+    def test_expiry(self):
+        self.cache.set('short', 1, timeout=0.05)
+        self.cache.set('forever', 1, timeout=None)
+        self.assertTrue(self.cache.has_key('short'))
+        time.sleep(0.06)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertTrue(self.cache.has_key('forever'))
+        self.assertTrue(self.cache.add('short', 2))
+        self.assertFalse(self.cache.add('short', 3))
+        self.assertEqual(self.cache.get('short'), 2)
+
+    def test_incr_delete(self):
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.cache.delete_many(['a', 'counter'])
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'counter']), {'b': 2}
+        )
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('b'))
+
+    def test_tags(self):
+        self.cache.set('post', 1, tags=['post:1', 'author:1'])
+        self.cache.set_many({'list': 2, 'other': 3}, tags=['author:1'])
+        self.cache.set('group', 4, tags=['group:test-slug'])
+        self.assertEqual(self.cache.invalidate_tags('author:1'), 3)
+        self.assertEqual(
+            self.cache.get_many(['post', 'list', 'other', 'group']),
+            {'group': 4}
+        )
+        self.assertEqual(self.cache.invalidate_tags('post:1'), 0)
+        # Перезапись заменяет теги записи.
+        self.cache.set('group', 5)
+        self.assertEqual(self.cache.invalidate_tags('group:test-slug'), 0)
+        self.assertEqual(self.cache.get('group'), 5)
+
+    def test_cull(self):
+        cache = SQLiteCache(self.location, {'OPTIONS': {
+            'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2, 'CULL_PROBABILITY': 1,
+        }})
+        for i in range(11):
+            cache.set('key-%s' % i, i)
+        found = cache.get_many('key-%s' % i for i in range(11))
+        self.assertNotIn('key-0', found)
+        self.assertIn('key-10', found)
+        self.assertLessEqual(len(found), 10)
+
+    def test_shared_between_processes(self):
+        process = multiprocessing.get_context('spawn').Process(
+            target=set_in_child, args=(self.location,)
+        )
+        process.start()
+        process.join()
+        self.assertEqual(self.cache.get('from-child'), 42)
+        self.assertEqual(self.cache.invalidate_tags('child'), 1)
@@ -0,0 +1,106 @@
+import gzip
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Post
+from ..compression import brotli, compress_response
+
+User = get_user_model()
+HTML = '<p>Тестовый текст поста.</p>\n' * 100
+
+
+class CompressResponseTests(SimpleTestCase):
+    def compress(self, response, accept='gzip, deflate'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        return compress_response(request, response)
+
+    def test_gzip(self):
+        response = self.compress(HttpResponse(HTML))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content))
+        )
+        self.assertEqual(gzip.decompress(response.content).decode(), HTML)
+
+    @unittest.skipIf(brotli is None, 'пакет Brotli не установлен')
+    def test_brotli_preferred(self):
+        response = self.compress(HttpResponse(HTML), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content).decode(), HTML)
+
+    def test_streaming(self):
+        chunks = [HTML.encode()] * 5
+        response = self.compress(StreamingHttpResponse(iter(chunks)))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            b''.join(chunks)
+        )
+
+    def test_weak_etag(self):
+        response = HttpResponse(HTML)
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.compress(response)['ETag'], 'W/"abc"')
+
+    def test_skipped(self):
+        encoded = HttpResponse(HTML)
+        encoded['Content-Encoding'] = 'gzip'
+        partial = HttpResponse(HTML, status=206)
+        cases = {
+            'small': HttpResponse('<p>Коротко</p>'),
+            'image': HttpResponse(HTML, content_type='image/jpeg'),
+            'encoded': encoded,
+            'partial': partial,
+        }
+        for name, response in cases.items():
+            with self.subTest(case=name):
+                content = response.content
+                response = self.compress(response)
+                self.assertEqual(response.content, content)
+
+    def test_identity_only(self):
+        response = self.compress(HttpResponse(HTML), 'identity, gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+
+# Чтение на основной базе: данные теста не попадают в реплику.
+@override_settings(DATABASE_REPLICAS=[])
+class CompressionMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        Post.objects.bulk_create(
+            Post(text=HTML, author=cls.user) for _ in range(3)
+        )
+
+    def setUp(self):
+        self.client = Client(HTTP_ACCEPT_ENCODING='gzip')
+
+    def test_page_compressed(self):
+        response = self.client.get(reverse('posts:index'))
+        plain = Client().get(reverse('posts:index'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertIn('compress;dur=', response['Server-Timing'])
+
+    def test_etag_still_validates(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(
+            reverse('posts:index'), HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
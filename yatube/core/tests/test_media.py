@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..media import parse_range
+
+CONTENT = bytes(range(256)) * 1024
+
+
+class ParseRangeTests(TestCase):
+    def test_parse_range(self):
+        cases = {
+            'bytes=0-99': (0, 99),
+            'bytes=100-': (100, 999),
+            'bytes=-100': (900, 999),
+            'bytes=-5000': (0, 999),
+            'bytes=900-5000': (900, 999),
+            'bytes=0-1,5-6': None,
+            'bytes=20-10': None,
+            'items=0-1': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 1000), expected)
+        for header in ('bytes=1000-', 'bytes=-0'):
+            with self.subTest(header=header):
+                with self.assertRaises(ValueError):
+                    parse_range(header, 1000)
+
+
+class MediaViewTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, 'posts'))
+        for name in ('posts/big.jpg', 'secret.txt', 'posts/.hidden'):
+            with open(os.path.join(self.root, name), 'wb') as file:
+                file.write(CONTENT)
+        settings = override_settings(MEDIA_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.url = reverse('media', args=['posts/big.jpg'])
+
+    def get(self, url=None, **headers):
+        return self.client.get(url or self.url, **headers)
+
+    def test_full_file_streamed(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_range(self):
+        response = self.get(HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(
+            response['Content-Range'], 'bytes 100-199/%s' % len(CONTENT)
+        )
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(
+            b''.join(response.streaming_content), CONTENT[100:200]
+        )
+
+    def test_suffix_range(self):
+        response = self.get(HTTP_RANGE='bytes=-10')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-10:])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE='bytes=%s-' % len(CONTENT))
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(
+            response['Content-Range'], 'bytes */%s' % len(CONTENT)
+        )
+
+    def test_if_range_mismatch_sends_whole_file(self):
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+    def test_conditional(self):
+        response = self.get()
+        self.assertEqual(
+            self.get(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+        )
+        self.assertEqual(
+            self.get(
+                HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            ).status_code,
+            304
+        )
+
+    def test_access(self):
+        for path in (
+            'secret.txt', 'posts/.hidden', 'posts/../secret.txt',
+            'posts/missing.jpg', 'posts'
+        ):
+            with self.subTest(path=path):
+                response = self.get('/media/' + path)
+                self.assertEqual(response.status_code, 404)
+
+    def test_only_safe_methods(self):
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_accel_redirect(self):
+        response = self.get(HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/big.jpg'
+        )
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Sendfile')
+    def test_sendfile(self):
+        response = self.get()
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(os.path.realpath(self.root), 'posts', 'big.jpg')
+        )
@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .. import metrics
+from ..cache import SQLiteCache
+
+User = get_user_model()
+
+
+class RegistryTests(SimpleTestCase):
+    def test_render(self):
+        registry = metrics.Registry()
+        for queries in (1, 4, 4):
+            measured = metrics.RequestMetrics()
+            measured.db_queries = queries
+            measured.cache_hits = 2
+            registry.record('posts:index', measured, 0.02)
+        text = registry.render()
+        expected = [
+            '# TYPE yatube_db_queries histogram',
+            'yatube_db_queries_bucket{view="posts:index",le="1"} 1',
+            'yatube_db_queries_bucket{view="posts:index",le="3"} 1',
+            'yatube_db_queries_bucket{view="posts:index",le="5"} 3',
+            'yatube_db_queries_bucket{view="posts:index",le="+Inf"} 3',
+            'yatube_db_queries_sum{view="posts:index"} 9',
+            'yatube_request_duration_seconds_count{view="posts:index"} 3',
+            '# TYPE yatube_cache_hits_total counter',
+            'yatube_cache_hits_total{view="posts:index"} 6',
+        ]
+        for line in expected:
+            with self.subTest(line=line):
+                self.assertIn(line + '\n', text)
+
+    def test_sqlite_cache_lookups_counted(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = SQLiteCache(os.path.join(directory, 'cache.sqlite3'), {})
+        cache.set('key', 'значение')
+        measured = metrics.start()
+        self.addCleanup(metrics.stop)
+        cache.get('missing')
+        cache.get('key')
+        # get_or_set: промах, запись и повторное чтение.
+        cache.get_or_set('other', 1)
+        cache.get_many(['key', 'missing'])
+        self.assertEqual((measured.cache_hits, measured.cache_misses), (3, 3))
+
+    def test_percentile(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(metrics.percentile(values, 50), 3)
+        self.assertEqual(metrics.percentile(values, 0), 1)
+        self.assertEqual(metrics.percentile(values, 100), 5)
+        self.assertAlmostEqual(metrics.percentile(values, 95), 4.8)
+        self.assertEqual(metrics.percentile([7], 99), 7)
+
+
+# Чтение на основной базе: данные теста не попадают в реплику.
+@override_settings(DATABASE_REPLICAS=[])
+class MetricsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+        cls.staff = User.objects.create_user(
+            username='Staff', is_staff=True
+        )
+        cls.staff_client = Client()
+        cls.staff_client.force_login(cls.staff)
+
+    def test_server_timing(self):
+        response = MetricsMiddlewareTests.guest_client.get(
+            reverse('posts:index')
+        )
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'cache;desc=', 'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+        self.assertNotIn('tpl;dur=0.0', timing)
+
+    def test_endpoint(self):
+        MetricsMiddlewareTests.guest_client.get(reverse('posts:index'))
+        response = MetricsMiddlewareTests.staff_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertContains(
+            response,
+            'yatube_request_duration_seconds_count{view="posts:index"}'
+        )
+
+    def test_endpoint_staff_only(self):
+        for client in (
+            MetricsMiddlewareTests.guest_client,
+            MetricsMiddlewareTests.user_client
+        ):
+            response = client.get(reverse('metrics'))
+            self.assertEqual(response.status_code, 302)
@@ -0,0 +1,133 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+from unittest import skipUnless
+
+from posts.models import Post
+from .. import replication, routers
+from ..middleware import ReplicaPinMiddleware
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.PrimaryReplicaRouter()
+        self.addCleanup(routers.unpin)
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_pinned_reads_go_to_primary(self):
+        routers.pin()
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        routers.unpin()
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_instance_hint_keeps_database(self):
+        post = Post()
+        post._state.db = 'default'
+        self.assertEqual(
+            self.router.db_for_read(Post, instance=post), 'default'
+        )
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_pinned_block_restores_state(self):
+        with routers.pinned():
+            with routers.pinned():
+                self.assertEqual(self.router.db_for_read(Post), 'default')
+            self.assertTrue(routers.is_pinned())
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+
+class ReplicaPinMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.seen = []
+        self.middleware = ReplicaPinMiddleware(self.view)
+
+    def view(self, request):
+        self.seen.append(routers.is_pinned())
+        return HttpResponse()
+
+    def test_write_pins_and_sets_cookie(self):
+        response = self.middleware(self.factory.post('/'))
+        self.assertEqual(self.seen, [True])
+        self.assertFalse(routers.is_pinned())
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+        self.assertGreater(int(cookie.value), time.time())
+
+    def test_read_with_cookie(self):
+        cookies = {
+            str(int(time.time()) + 5): True,
+            str(int(time.time()) - 5): False,
+            'garbage': False,
+        }
+        for value, pinned in cookies.items():
+            with self.subTest(value=value):
+                self.seen.clear()
+                request = self.factory.get('/')
+                request.COOKIES[settings.REPLICA_PIN_COOKIE] = value
+                response = self.middleware(request)
+                self.assertEqual(self.seen, [pinned])
+                self.assertNotIn(
+                    settings.REPLICA_PIN_COOKIE, response.cookies
+                )
+
+    def test_read_without_cookie(self):
+        self.middleware(self.factory.get('/'))
+        self.assertEqual(self.seen, [False])
+
+    def test_pin_primary_view_sets_cookie(self):
+        middleware = ReplicaPinMiddleware(routers.pin_primary(self.view))
+        response = middleware(self.factory.get('/'))
+        self.assertEqual(self.seen, [True])
+        self.assertFalse(routers.is_pinned())
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_keeps_outer_pin(self):
+        with routers.pinned():
+            self.middleware(self.factory.get('/'))
+            self.assertTrue(routers.is_pinned())
+        self.assertEqual(self.seen, [True])
+
+
+@skipUnless(
+    'replica' in settings.DATABASES,
+    'Нужна реплика: --settings=yatube.settings_replica'
+)
+class ReadYourWritesTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='NoName')
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+        replication.sync('replica')
+
+    def test_author_sees_post_before_replication(self):
+        response = self.user_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Свежий пост.'}
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        self.assertFalse(Post.objects.filter(text='Свежий пост.').exists())
+        response = self.user_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост.')
+        replication.sync('replica')
+        self.assertTrue(Post.objects.filter(text='Свежий пост.').exists())
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост.')
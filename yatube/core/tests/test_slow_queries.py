@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..slow_queries import fingerprint
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_fingerprint(self):
+        queries = {
+            'SELECT * FROM t WHERE id = 5': 'SELECT * FROM t WHERE id = ?',
+            "SELECT * FROM t WHERE s = 'it''s'": (
+                'SELECT * FROM t WHERE s = ?'
+            ),
+            'SELECT * FROM t WHERE id IN (%s, %s,\n %s)': (
+                'SELECT * FROM t WHERE id IN (...)'
+            ),
+            'SELECT "t2"."a"  FROM "t2"': 'SELECT "t2"."a" FROM "t2"',
+        }
+        for sql, expected in queries.items():
+            with self.subTest(sql=sql):
+                self.assertEqual(fingerprint(sql), expected)
+
+
+# Чтение на основной базе: данные теста не попадают в реплику.
+@override_settings(DATABASE_REPLICAS=[])
+class SlowQueryLogTests(TestCase):
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_logged_with_plan(self):
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            Client().get(reverse('posts:index'))
+            Client().get(reverse('posts:search'), {'q': 'секретный'})
+        records = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertTrue(
+            any('секретный' in str(record['params']) for record in records)
+        )
+        select = next(
+            record for record in records
+            if record['sql'].startswith('SELECT') and record['plan']
+        )
+        self.assertEqual(select['view'], 'posts:index')
+        self.assertEqual(select['path'], reverse('posts:index'))
+        self.assertTrue(select['caller'].startswith('posts/'))
+        self.assertIn('fingerprint', select)
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_LOG_PARAMS=False)
+    def test_params_hidden(self):
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            Client().get(reverse('posts:search'), {'q': 'секретный'})
+        records = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertTrue(all(record['params'] is None for record in records))
+        self.assertFalse(
+            any('секретный' in record.getMessage() for record in logs.records)
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD=None)
+    def test_disabled(self):
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('yatube.slow_queries', 'WARNING'):
+                Client().get(reverse('posts:index'))
+
+
+class SlowQueriesCommandTests(SimpleTestCase):
+    def record(self, sql, duration, view='posts:index'):
+        return json.dumps({
+            'duration_ms': duration,
+            'view': view,
+            'sql': sql,
+            'fingerprint': fingerprint(sql),
+            'caller': 'posts/views.py:1 in index: list(posts)',
+            'plan': ['SCAN posts_post'],
+        })
+
+    def test_summary(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'slow.jsonl')
+            with open(path + '.1', 'w') as file:
+                file.write(self.record('SELECT 1 FROM t WHERE id = 1', 300))
+                file.write('\n')
+            with open(path, 'w') as file:
+                for line in (
+                    self.record('SELECT 1 FROM t WHERE id = 2', 100),
+                    'не JSON',
+                    self.record('SELECT 2 FROM u', 50, 'posts:profile'),
+                ):
+                    file.write(line + '\n')
+            out = StringIO()
+            call_command('slow_queries', path=path, stdout=out)
+        output = out.getvalue()
+        self.assertLess(
+            output.index('SELECT ? FROM t WHERE id = ?'),
+            output.index('SELECT ? FROM u')
+        )
+        self.assertIn('запросов 2, всего 400.0 мс', output)
+        self.assertIn('план: SCAN posts_post', output)
+        self.assertIn('posts:profile (1)', output)
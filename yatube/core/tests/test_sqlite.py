@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.db import OperationalError, connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..sqlite import retry_locked
+
+
+class PragmaTests(TestCase):
+    def test_pragmas_applied(self):
+        pragmas = {
+            # Значения в том виде, в котором их возвращает SQLite.
+            'synchronous': 1,
+            'cache_size': -20000,
+            'temp_store': 2,
+        }
+        with connection.cursor() as cursor:
+            for name, value in pragmas.items():
+                with self.subTest(pragma=name):
+                    cursor.execute('PRAGMA %s' % name)
+                    self.assertEqual(cursor.fetchone()[0], value)
+
+
+@override_settings(DB_WRITE_RETRIES=3, DB_WRITE_RETRY_DELAY=0.01)
+@mock.patch('core.sqlite.time.sleep')
+class RetryLockedTests(SimpleTestCase):
+    databases = {'default'}
+
+    def failing(self, errors):
+        calls = []
+
+        @retry_locked
+        def view():
+            calls.append(None)
+            if len(calls) <= errors:
+                raise OperationalError('database is locked')
+            return 'ok'
+        return view, calls
+
+    def test_retries_until_success(self, sleep):
+        view, calls = self.failing(2)
+        self.assertEqual(view(), 'ok')
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(sleep.call_count, 2)
+        first, second = (call.args[0] for call in sleep.call_args_list)
+        self.assertLess(first, 0.015 + 1e-9)
+        self.assertGreaterEqual(second, 0.01)
+
+    def test_gives_up(self, sleep):
+        view, calls = self.failing(10)
+        with self.assertRaises(OperationalError):
+            view()
+        self.assertEqual(len(calls), 4)
+
+    def test_other_errors_not_retried(self, sleep):
+        @retry_locked
+        def view():
+            raise OperationalError('no such table: posts_post')
+        with self.assertRaises(OperationalError):
+            view()
+        sleep.assert_not_called()
+
+    def test_not_retried_inside_transaction(self, sleep):
+        view, calls = self.failing(1)
+        with transaction.atomic():
+            with self.assertRaises(OperationalError):
+                view()
+        self.assertEqual(len(calls), 1)
@@ -0,0 +1,118 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+
+from ..staticfiles import StaticFilesApplication, accepted_encodings, brotli
+
+CSS = 'body { color: #333; }\n' * 50
+
+
+def inner_app(environ, start_response):
+    start_response('404 Not Found', [('Content-Type', 'text/plain')])
+    return [b'django']
+
+
+class StaticFilesTests(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'w') as file:
+            file.write(CSS)
+        settings = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            INSTALLED_APPS=['django.contrib.staticfiles'],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def collect(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        return staticfiles_storage.stored_name('css/site.css')
+
+    def get(self, name, **environ):
+        responses = []
+        app = StaticFilesApplication(inner_app)
+        body = app(
+            {
+                'PATH_INFO': '/static/' + name,
+                'REQUEST_METHOD': 'GET',
+                **environ,
+            },
+            lambda status, headers: responses.append((status, headers))
+        )
+        status, headers = responses[0]
+        return status, dict(headers), b''.join(body)
+
+    def test_unhashed_url_without_manifest(self):
+        self.assertEqual(static('css/site.css'), '/static/css/site.css')
+
+    def test_collectstatic_hashes_and_compresses(self):
+        hashed = self.collect()
+        self.assertRegex(hashed, r'^css/site\.[0-9a-f]{12}\.css$')
+        self.assertEqual(static('css/site.css'), '/static/' + hashed)
+        with gzip.open(os.path.join(self.root, hashed + '.gz')) as file:
+            self.assertEqual(file.read().decode(), CSS)
+        self.assertEqual(
+            os.path.exists(os.path.join(self.root, hashed + '.br')),
+            brotli is not None
+        )
+
+    def test_serves_precompressed_immutable(self):
+        hashed = self.collect()
+        status, headers, body = self.get(
+            hashed, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(headers['Content-Type'], 'text/css')
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(int(headers['Content-Length']), len(body))
+        self.assertEqual(gzip.decompress(body).decode(), CSS)
+
+    @unittest.skipIf(brotli is None, 'пакет Brotli не установлен')
+    def test_prefers_brotli(self):
+        hashed = self.collect()
+        _, headers, _ = self.get(hashed, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(headers['Content-Encoding'], 'br')
+
+    def test_identity_and_short_cache_for_unhashed(self):
+        self.collect()
+        status, headers, body = self.get(
+            'css/site.css', HTTP_ACCEPT_ENCODING='gzip;q=0'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertNotIn('immutable', headers['Cache-Control'])
+        self.assertEqual(body.decode(), CSS)
+
+    def test_not_modified(self):
+        hashed = self.collect()
+        _, headers, _ = self.get(hashed)
+        status, _, body = self.get(hashed, HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_falls_through_to_django(self):
+        self.collect()
+        for name in ('missing.css', '../' + os.path.basename(self.source)):
+            with self.subTest(name=name):
+                status, _, body = self.get(name)
+                self.assertEqual(body, b'django')
+
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            accepted_encodings('gzip;q=1.0, br; q=0, identity'),
+            {'gzip', 'identity'}
+        )
@@ -0,0 +1,143 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Post
+from ..throttle import client_ip, parse_rate, take
+
+User = get_user_model()
+
+
+class TakeTests(SimpleTestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('30/m'), (30, 60))
+        self.assertEqual(parse_rate('5/h'), (5, 3600))
+        for rate in ('30', '30/w', 'x/m', None):
+            with self.subTest(rate=rate):
+                with self.assertRaises(ImproperlyConfigured):
+                    parse_rate(rate)
+
+    @mock.patch('core.throttle.time.time')
+    def test_bucket(self, now):
+        now.return_value = 1000.0
+        for _ in range(3):
+            self.assertEqual(take(['bucket'], '3/m'), 0)
+        self.assertAlmostEqual(take(['bucket'], '3/m'), 20)
+        # Другая корзина не затронута.
+        self.assertEqual(take(['other'], '3/m'), 0)
+        now.return_value = 1020.0
+        self.assertEqual(take(['bucket'], '3/m'), 0)
+        self.assertGreater(take(['bucket'], '3/m'), 0)
+
+    @mock.patch('core.throttle.time.time', return_value=1000.0)
+    def test_all_buckets_charged_together(self, now):
+        self.assertEqual(take(['ip'], '2/m'), 0)
+        self.assertEqual(take(['ip'], '2/m'), 0)
+        # Пустая корзина IP не даёт списать жетон и у пользователя.
+        self.assertGreater(take(['ip', 'user'], '2/m'), 0)
+        self.assertEqual(take(['user'], '2/m'), 0)
+        self.assertEqual(take(['user'], '2/m'), 0)
+
+
+class ClientIpTests(SimpleTestCase):
+    def client_ip(self, forwarded=None):
+        headers = {'REMOTE_ADDR': '10.0.0.1'}
+        if forwarded is not None:
+            headers['HTTP_X_FORWARDED_FOR'] = forwarded
+        return client_ip(RequestFactory().get('/', **headers))
+
+    def test_remote_addr_by_default(self):
+        self.assertEqual(self.client_ip('203.0.113.5'), '10.0.0.1')
+
+    @override_settings(
+        RATE_LIMIT_CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR',
+        RATE_LIMIT_TRUSTED_PROXIES=2
+    )
+    def test_trusted_proxies(self):
+        cases = {
+            # Клиент подставил свой адрес, но его не берём.
+            '1.1.1.1, 203.0.113.5, 10.0.0.2': '203.0.113.5',
+            '203.0.113.5, 10.0.0.2': '203.0.113.5',
+            # Запрос в обход внешнего прокси.
+            '10.0.0.2': '10.0.0.1',
+            '': '10.0.0.1',
+            None: '10.0.0.1',
+        }
+        for forwarded, expected in cases.items():
+            with self.subTest(forwarded=forwarded):
+                self.assertEqual(self.client_ip(forwarded), expected)
+
+
+# Чтение на основной базе: данные теста не попадают в реплику.
+@override_settings(
+    RATE_LIMITS={'comments': '2/m', 'signup': '1/h'},
+    DATABASE_REPLICAS=[]
+)
+class ThrottleViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.post = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=cls.user
+        )
+
+    def setUp(self):
+        self.user_client = Client()
+        self.user_client.force_login(ThrottleViewTests.user)
+        self.url = reverse(
+            'posts:add_comment', args=[ThrottleViewTests.post.id]
+        )
+
+    def test_rate_limited(self):
+        for _ in range(2):
+            response = self.user_client.post(self.url, {'text': 'Текст'})
+            self.assertEqual(response.status_code, 302)
+        response = self.user_client.post(self.url, {'text': 'Текст'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(ThrottleViewTests.post.comments.count(), 2)
+
+    def test_limited_per_user(self):
+        other = User.objects.create_user(username='Other')
+        other_client = Client(REMOTE_ADDR='10.0.0.2')
+        other_client.force_login(other)
+        for _ in range(2):
+            self.user_client.post(self.url, {'text': 'Текст'})
+        response = other_client.post(self.url, {'text': 'Текст'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_safe_methods_not_limited(self):
+        for _ in range(3):
+            response = self.user_client.get(reverse('posts:post_create'))
+            self.assertEqual(response.status_code, 200)
+
+    def test_signup_limited_by_ip(self):
+        data = {
+            'username': 'new_user',
+            'password1': 'Sup3r-secret-pass',
+            'password2': 'Sup3r-secret-pass',
+        }
+        response = self.client.post(reverse('users:signup'), data)
+        self.assertEqual(response.status_code, 302)
+        data['username'] = 'another_user'
+        response = self.client.post(reverse('users:signup'), data)
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(User.objects.filter(username='another_user'))
+
+    @override_settings(WRITE_CONCURRENCY=0)
+    def test_load_shed(self):
+        response = self.user_client.post(self.url, {'text': 'Текст'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertFalse(ThrottleViewTests.post.comments.exists())
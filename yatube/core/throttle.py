@@ -0,0 +1,137 @@
+import functools
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+KEY = 'throttle:%s:%s'
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """'30/m' -> (30, 60): число запросов и период в секундах."""
+    try:
+        count, period = rate.split('/')
+        return int(count), PERIODS[period]
+    except (AttributeError, KeyError, ValueError):
+        raise ImproperlyConfigured('Неверный лимит %r' % (rate,))
+
+
+def client_ip(request):
+    """Адрес клиента с учётом ``RATE_LIMIT_TRUSTED_PROXIES`` своих прокси.
+
+    Каждый прокси дописывает в заголовок адрес, с которого пришёл
+    запрос, поэтому адрес клиента - N-й справа. Если адресов меньше,
+    запрос пришёл в обход прокси, и верить можно только REMOTE_ADDR.
+    """
+    header = settings.RATE_LIMIT_CLIENT_IP_HEADER
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    remote_addr = request.META.get('REMOTE_ADDR')
+    if not header or proxies < 1:
+        return remote_addr
+    addresses = [
+        address.strip()
+        for address in request.META.get(header, '').split(',')
+        if address.strip()
+    ]
+    if len(addresses) < proxies:
+        return remote_addr
+    return addresses[-proxies]
+
+
+def client_keys(scope, request):
+    keys = [KEY % (scope, 'ip:%s' % client_ip(request))]
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        keys.append(KEY % (scope, 'user:%s' % user.pk))
+    return keys
+
+
+def take(keys, rate):
+    """Забирает по жетону из корзин ``keys``.
+
+    Корзина хранится как момент, к которому она снова станет полной
+    (GCRA): одно число на ключ и никаких фоновых пополнений. Жетон
+    списывается, только если он есть во всех корзинах. Возвращает 0
+    или сколько секунд ждать следующего жетона. Гонка двух процессов
+    между чтением и записью может пропустить лишний запрос - для
+    защиты от перегрузки это допустимо.
+    """
+    count, period = parse_rate(rate)
+    interval = period / count
+    now = time.time()
+    full_at = cache.get_many(keys)
+    wait = 0
+    updated = {}
+    for key in keys:
+        due = max(full_at.get(key, now), now) + interval
+        wait = max(wait, due - period - now)
+        updated[key] = due
+    if wait > 0:
+        return wait
+    cache.set_many(updated, math.ceil(period))
+    return 0
+
+
+def write_slots():
+    """Семафор одновременных запросов на запись в этом процессе."""
+    global _slots
+    limit = settings.WRITE_CONCURRENCY
+    with _slots_lock:
+        if _slots is None or _slots.limit != limit:
+            _slots = threading.BoundedSemaphore(limit)
+            _slots.limit = limit
+        return _slots
+
+
+def rejected(status, retry_after, message):
+    response = HttpResponse(message, status=status)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def throttle(scope, methods=UNSAFE_METHODS):
+    """Ограничивает запись: лимит на клиента и число одновременных записей.
+
+    Лимит ``settings.RATE_LIMITS[scope]`` считается отдельно по IP и по
+    пользователю, превышение сразу получает 429. Когда в процессе уже
+    идут ``WRITE_CONCURRENCY`` записей, новые получают 503, не вставая
+    в очередь к блокировке SQLite. Оба ответа несут Retry-After.
+    Запросы с методами не из ``methods`` проходят без ограничений.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return view(request, *args, **kwargs)
+            slots = write_slots()
+            if not slots.acquire(blocking=False):
+                logger.info('Запись %s отклонена: нет свободных слотов', scope)
+                return rejected(
+                    503, settings.WRITE_SHED_RETRY_AFTER,
+                    'Сервер перегружен, повторите позже.'
+                )
+            try:
+                rate = settings.RATE_LIMITS.get(scope)
+                wait = rate and take(client_keys(scope, request), rate)
+                if wait:
+                    logger.info('Запись %s отклонена по лимиту', scope)
+                    return rejected(
+                        429, wait, 'Слишком много запросов, подождите.'
+                    )
+                return view(request, *args, **kwargs)
+            finally:
+                slots.release()
+        return wrapper
+    return decorator
@@ -0,0 +1,61 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, Profile, User
+
+# Счётчик профиля -> (модель, поле связи с пользователем).
+PROFILE_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def change(queryset, field, delta):
+    """Атомарно сдвигает счётчик на delta, не опуская его ниже нуля."""
+    if delta < 0:
+        queryset = queryset.filter(**{'%s__gte' % field: -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def real_count(model, related, outer):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{related: OuterRef(outer)}
+            ).order_by().values(related).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        0
+    )
+
+
+def rebuild():
+    """Пересчитывает разошедшиеся счётчики, возвращает число исправлений."""
+    fixed = 0
+    Profile.objects.bulk_create(
+        Profile(user=user) for user in User.objects.filter(
+            profile__isnull=True
+        )
+    )
+    profiles = Profile.objects.annotate(**{
+        'real_' + field: real_count(model, related, 'user')
+        for field, (model, related) in PROFILE_COUNTERS.items()
+    })
+    for profile in profiles.iterator():
+        drifted = {
+            field: getattr(profile, 'real_' + field)
+            for field in PROFILE_COUNTERS
+            if getattr(profile, field) != getattr(profile, 'real_' + field)
+        }
+        if drifted:
+            Profile.objects.filter(pk=profile.pk).update(**drifted)
+            fixed += len(drifted)
+    posts = Post.objects.annotate(
+        real_comments_count=real_count(Comment, 'post', 'pk')
+    ).exclude(comments_count=F('real_comments_count'))
+    for post_id, total in posts.values_list('pk', 'real_comments_count'):
+        Post.objects.filter(pk=post_id).update(comments_count=total)
+        fixed += 1
+    return fixed
@@ -0,0 +1,42 @@
+from . import pages, versions
+from .models import Group, User
+
+
+def list_etag(request, scope):
+    """ETag списка постов вместе с версией подписок пользователя.
+
+    От подписок зависят кнопки на карточках постов.
+    """
+    scopes = [scope]
+    if request.user.is_authenticated:
+        scopes.append('following:%s' % request.user.pk)
+    return versions.etag(request, *scopes)
+
+
+def index(request):
+    return list_etag(request, 'index')
+
+
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True
+    ).first()
+    if group_id is None:
+        return None
+    return list_etag(request, 'group:%s' % group_id)
+
+
+def profile(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True
+    ).first()
+    if author_id is None:
+        return None
+    return list_etag(request, 'author:%s' % author_id)
+
+
+def post_detail(request, post_id):
+    scopes = pages.detail_scopes(request, post_id)
+    if scopes is None:
+        return None
+    return versions.etag(request, *scopes)
@@ -0,0 +1,73 @@
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+KEY = 'posts:following:%s'
+# Набор, уже прочитанный за запрос, хранится на объекте пользователя.
+ATTR = '_following_ids'
+# Беззнаковые 4 байта на id: компактнее pickle множества чисел.
+TYPECODE = 'I'
+
+
+def pack(author_ids):
+    return array(TYPECODE, sorted(author_ids)).tobytes()
+
+
+def unpack(packed):
+    ids = array(TYPECODE)
+    ids.frombytes(packed)
+    return frozenset(ids)
+
+
+def load(user_id):
+    """Читает id авторов подписок пользователя одним запросом."""
+    return Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True
+    )
+
+
+def following_ids(user):
+    """Множество id авторов, на которых подписан пользователь.
+
+    Берётся из кэша, при промахе - одним запросом из базы. Для гостя
+    множество пустое и запросов нет.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    ids = getattr(user, ATTR, None)
+    if ids is None:
+        key = KEY % user.pk
+        packed = cache.get(key)
+        if packed is None:
+            packed = pack(load(user.pk))
+            cache.set(key, packed, settings.FOLLOWING_CACHE_TIMEOUT)
+        ids = unpack(packed)
+        setattr(user, ATTR, ids)
+    return ids
+
+
+def is_following(user, author_id):
+    return author_id in following_ids(user)
+
+
+def are_following(user, author_ids):
+    """Отвечает сразу по многим авторам: {id автора: подписан ли}."""
+    ids = following_ids(user)
+    return {author_id: author_id in ids for author_id in author_ids}
+
+
+def forget(user_id, user=None):
+    """Сбрасывает набор подписок после подписки или отписки.
+
+    Ключ удаляется сразу и ещё раз после коммита: набор, перечитанный
+    параллельным запросом до коммита, иначе остался бы в кэше устаревшим.
+    """
+    key = KEY % user_id
+    if user is not None:
+        user.__dict__.pop(ATTR, None)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
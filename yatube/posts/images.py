@@ -0,0 +1,75 @@
+import os
+import tempfile
+import warnings
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, ImageOps
+
+EXTENSIONS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'GIF': 'gif',
+    'WEBP': 'webp',
+}
+# Служебные данные, без которых картинка отображается иначе.
+KEEP_INFO = ('transparency',)
+
+
+def save_options(image_format):
+    quality = settings.POST_IMAGE_QUALITY
+    return {
+        'JPEG': {'quality': quality, 'optimize': True, 'progressive': True},
+        'WEBP': {'quality': quality},
+        'PNG': {'optimize': True},
+    }.get(image_format, {})
+
+
+def open_image(upload):
+    upload.seek(0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', Image.DecompressionBombWarning)
+        try:
+            image = Image.open(upload)
+        except (Image.DecompressionBombWarning, Image.DecompressionBombError):
+            image = None
+    if image is None or (
+        image.width * image.height > settings.POST_IMAGE_MAX_PIXELS
+    ):
+        raise ValidationError(
+            'Изображение слишком большое.',
+            code='image_too_large'
+        )
+    return image
+
+
+def normalize(upload):
+    """Уменьшает загруженную картинку, удаляет метаданные и пересжимает.
+
+    Результат пишется во временный файл, а не в память."""
+    image = open_image(upload)
+    image_format = image.format if image.format in EXTENSIONS else 'JPEG'
+    max_size = settings.POST_IMAGE_MAX_SIZE
+    if image.format == 'JPEG':
+        # JPEG можно сразу декодировать в уменьшенном масштабе.
+        image.draft('RGB', max_size)
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(max_size, Image.LANCZOS)
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    image.info = {
+        key: value for key, value in image.info.items() if key in KEEP_INFO
+    }
+    output = tempfile.TemporaryFile(dir=settings.FILE_UPLOAD_TEMP_DIR)
+    image.save(output, image_format, **save_options(image_format))
+    name = '%s.%s' % (
+        os.path.splitext(os.path.basename(upload.name))[0],
+        EXTENSIONS[image_format]
+    )
+    return UploadedFile(
+        file=output,
+        name=name,
+        content_type=Image.MIME[image_format],
+        size=output.tell()
+    )
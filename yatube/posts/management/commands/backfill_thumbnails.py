@@ -0,0 +1,27 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core import routers
+from posts.models import Post
+from posts.thumbnails import backfill
+
+
+class Command(BaseCommand):
+    help = 'Создаёт недостающие миниатюры картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов, по умолчанию по числу ядер.'
+        )
+
+    @routers.pinned()
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only('id', 'image')
+        created, failed = backfill(posts.iterator(), options['workers'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Создано миниатюр: %s, с ошибкой: %s' % (created, failed)
+            )
+        )
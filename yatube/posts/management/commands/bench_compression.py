@@ -0,0 +1,109 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core import routers
+from core.compression import (
+    BrotliCompressor,
+    GzipCompressor,
+    brotli,
+    compress,
+    compress_stream,
+)
+from .bench_views import Command as BenchViews
+
+MS = 1000
+# Кусок потокового ответа: так же рвёт тело StreamingHttpResponse.
+STREAM_CHUNK = 4096
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет, сколько байт экономит сжатие страниц постов и сколько '
+        'времени процессора оно стоит, для gzip и brotli разных уровней.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def codecs(self):
+        codecs = [
+            ('gzip-%s' % level, lambda level=level: GzipCompressor(level))
+            for level in (1, 6, 9)
+        ]
+        if brotli is not None:
+            codecs += [
+                (
+                    'br-%s' % quality,
+                    lambda quality=quality: BrotliCompressor(quality)
+                )
+                for quality in (1, 5, 11)
+            ]
+        return codecs
+
+    def pages(self):
+        """Тела страниц без сжатия, как их видит вошедший пользователь."""
+        user, values, _ = BenchViews().sample()
+        client = Client()
+        client.force_login(user)
+        urls = {
+            'index': reverse('posts:index'),
+            'group_list': reverse(
+                'posts:group_list', args=[values['slug']]
+            ),
+            'profile': reverse('posts:profile', args=[values['username']]),
+            'post_detail': reverse(
+                'posts:post_detail', args=[values['post_id']]
+            ),
+            'follow_index': reverse('posts:follow_index'),
+        }
+        return {name: client.get(url).content for name, url in urls.items()}
+
+    def measure(self, make, content, repeat, stream=False):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            if stream:
+                chunks = [
+                    content[i:i + STREAM_CHUNK]
+                    for i in range(0, len(content), STREAM_CHUNK)
+                ]
+                compressed = b''.join(compress_stream(make(), chunks))
+            else:
+                compressed = compress(make(), content)
+            timings.append(time.perf_counter() - start)
+        return len(compressed), statistics.median(timings)
+
+    @routers.pinned()
+    def handle(self, *args, **options):
+        with override_settings(
+            DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+        ), transaction.atomic():
+            pages = self.pages()
+            transaction.set_rollback(True)
+        self.stdout.write('%-14s %-13s %9s %9s %7s %9s %9s' % (
+            'page', 'codec', 'bytes', 'saved', 'ratio', 'cpu', 'MB/s'
+        ))
+        rows = [
+            (name, False, make) for name, make in self.codecs()
+        ] + [('gzip-6 stream', True, lambda: GzipCompressor(6))]
+        for page, content in pages.items():
+            self.stdout.write('%-14s %-13s %9s' % (
+                page, 'identity', len(content)
+            ))
+            for codec, stream, make in rows:
+                size, elapsed = self.measure(
+                    make, content, options['repeat'], stream
+                )
+                self.stdout.write(
+                    '%-14s %-13s %9s %9s %6.1f%% %7.2fms %9.1f' % (
+                        '', codec, size, len(content) - size,
+                        size / len(content) * 100, elapsed * MS,
+                        len(content) / elapsed / 1e6
+                    )
+                )
@@ -0,0 +1,105 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core import routers
+from posts.models import Comment, Group, Post, User
+
+MS = 1000
+INDEXES = (
+    'post_author_pub_date',
+    'post_group_pub_date',
+    'comment_post_created',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время запросов лент с составными индексами и без них. '
+        'Данные и удаление индексов откатываются по завершении.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200000)
+        parser.add_argument('--authors', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def timed(self, queryset, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best * MS
+
+    def queries(self, author, group, post):
+        return {
+            'profile': author.posts.all()[:10],
+            'group_posts': group.posts.all()[:10],
+            'comments': post.comments.order_by('-created', '-id')[:20],
+        }
+
+    @routers.pinned()
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        repeat = options['repeat']
+        with transaction.atomic():
+            authors = [
+                User.objects.create_user(username='bench-feed-%s' % i)
+                for i in range(options['authors'])
+            ]
+            groups = [
+                Group.objects.create(
+                    title='bench', slug='bench-feed-%s' % i, description=''
+                ) for i in range(options['groups'])
+            ]
+            Post.objects.bulk_create(
+                (
+                    Post(
+                        text='bench',
+                        author=rng.choice(authors),
+                        group=rng.choice(groups)
+                    ) for _ in range(options['posts'])
+                ),
+                batch_size=500
+            )
+            post_ids = list(
+                Post.objects.filter(
+                    author__in=authors
+                ).values_list('id', flat=True)
+            )
+            Comment.objects.bulk_create(
+                (
+                    Comment(
+                        text='bench',
+                        author=rng.choice(authors),
+                        post_id=rng.choice(post_ids)
+                    ) for _ in range(options['comments'])
+                ),
+                batch_size=500
+            )
+            post = Post.objects.get(pk=post_ids[len(post_ids) // 2])
+            queries = self.queries(authors[0], groups[0], post)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            indexed = {
+                name: self.timed(queryset, repeat)
+                for name, queryset in queries.items()
+            }
+            with connection.cursor() as cursor:
+                for index in INDEXES:
+                    cursor.execute('DROP INDEX %s' % index)
+            queries = self.queries(authors[0], groups[0], post)
+            self.stdout.write(
+                '%-12s %12s %12s' % ('query', 'indexed', 'no index')
+            )
+            for name, queryset in queries.items():
+                self.stdout.write('%-12s %10.2fms %10.2fms' % (
+                    name, indexed[name], self.timed(queryset, repeat)
+                ))
+            transaction.set_rollback(True)
@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+
+from core import routers
+from posts.models import Post, User
+from posts.paginator import NEXT, CursorPaginator
+
+MS = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время выборки страницы при постраничной и курсорной '
+        'пагинации по мере роста таблицы постов. Все данные создаются '
+        'внутри транзакции и откатываются по завершении.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='10000,100000,1000000',
+            help='Размеры таблицы постов через запятую.'
+        )
+        parser.add_argument('--per-page', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def timed(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best * MS
+
+    @routers.pinned()
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        per_page, repeat = options['per_page'], options['repeat']
+        self.stdout.write(
+            '%10s %12s %12s %12s %12s' % (
+                'posts', 'page 1', 'page deep', 'cursor 1', 'cursor deep'
+            )
+        )
+        with transaction.atomic():
+            author = User.objects.create_user(username='bench-pagination')
+            post_list = Post.objects.all()
+            created = 0
+            for size in sizes:
+                while created < size:
+                    batch = min(options['batch_size'], size - created)
+                    Post.objects.bulk_create(
+                        Post(text='bench', author=author)
+                        for _ in range(batch)
+                    )
+                    created += batch
+                paginator = Paginator(post_list, per_page)
+                deep_page = paginator.num_pages
+                cursors = CursorPaginator(post_list, per_page)
+                anchor = post_list.order_by('-pub_date', '-id')[
+                    (deep_page - 1) * per_page - 1
+                ] if deep_page > 1 else None
+                deep_cursor = anchor and cursors.encode_cursor(NEXT, anchor)
+                self.stdout.write(
+                    '%10d %10.2fms %10.2fms %10.2fms %10.2fms' % (
+                        size,
+                        self.timed(
+                            lambda: list(
+                                Paginator(post_list, per_page).page(1)
+                            ), repeat
+                        ),
+                        self.timed(
+                            lambda: list(
+                                Paginator(post_list, per_page).page(deep_page)
+                            ), repeat
+                        ),
+                        self.timed(lambda: cursors.page(), repeat),
+                        self.timed(lambda: cursors.page(deep_cursor), repeat),
+                    )
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,121 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.utils import timezone
+
+from posts.models import Group, Post, User
+
+MS = 1000
+# Карточка в прежнем виде: {% url %} и {% load %} на каждый пост.
+LEGACY_CARD = '''{% load post_tags %}
+<div class="card my-4 shadow">
+  <div class="card-header text-white-50 bg-dark">
+    <div class="d-flex justify-content-between">
+      <span>
+        Автор:
+        <a href="{% url 'posts:profile' post.author.username %}">
+          {{ post.author.username }}
+        </a>
+        {% if post.group and show_group %}
+          Группа:
+          <a href="{% url 'posts:group_list' post.group.slug %}">
+            {{ post.group.title }}
+          </a>
+        {% endif %}
+      </span>
+      <span>
+        Дата публикации: {{ post.pub_date|date:"d E Y" }}
+        Комментариев: {{ post.comments_count }}
+      </span>
+    </div>
+  </div>
+  <div class="card-body">
+    <a href="{% url 'posts:post_detail' post.id %}">
+      {% post_thumbnail post.image as im %}
+      {% if im %}
+        <img class="card-img my-2" src="{{ im.url }}">
+      {% elif post.image %}
+        <img class="card-img my-2" src="{{ post.image.url }}">
+      {% endif %}
+      <p>{{ post.text|linebreaksbr }}</p>
+    </a>
+  </div>
+</div>
+'''
+LEGACY_LIST = (
+    '{% for post in posts %}'
+    '{% include card with show_group=True post=post %}'
+    '{% endfor %}'
+)
+CARDS_LIST = '{% load post_tags %}{% post_cards posts show_group=True %}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендеринга 10, 50 и 100 карточек постов через '
+        'include в цикле и через тег post_cards. База не используется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 50, 100]
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def posts(self, size, versioned=False):
+        now = timezone.now()
+        groups = [
+            Group(id=i, title='Группа %s' % i, slug='group-%s' % i)
+            for i in range(5)
+        ]
+        authors = [User(id=i, username='author-%s' % i) for i in range(10)]
+        posts = []
+        for i in range(size):
+            post = Post(
+                id=i + 1,
+                text='Текст поста номер %s.\nВторая строка.' % i,
+                author=authors[i % len(authors)],
+                group=groups[i % len(groups)] if i % 3 else None,
+                pub_date=now,
+                comments_count=i
+            )
+            if versioned:
+                post.cache_version = 'bench'
+            posts.append(post)
+        return posts
+
+    def timed(self, template, context, repeat, before=None):
+        best = None
+        for _ in range(repeat):
+            if before:
+                before()
+            start = time.perf_counter()
+            template.render(context)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best * MS
+
+    def handle(self, *args, **options):
+        engine = engines['django']
+        card = engine.from_string(LEGACY_CARD)
+        legacy = engine.from_string(LEGACY_LIST)
+        cards = engine.from_string(CARDS_LIST)
+        repeat = options['repeat']
+        self.stdout.write('%6s %12s %12s %12s' % (
+            'cards', 'include', 'post_cards', 'cached'
+        ))
+        for size in options['sizes']:
+            posts = self.posts(size)
+            versioned = self.posts(size, versioned=True)
+            cards.render({'posts': versioned})
+            self.stdout.write('%6s %10.2fms %10.2fms %10.2fms' % (
+                size,
+                self.timed(
+                    legacy, {'posts': posts, 'card': card.template}, repeat
+                ),
+                self.timed(cards, {'posts': posts}, repeat),
+                self.timed(cards, {'posts': versioned}, repeat),
+            ))
+        cache.clear()
@@ -0,0 +1,161 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import routers
+from core.metrics import percentile
+from posts import urls
+from posts.models import Group, Post, Profile
+
+MS = 1000
+QUERIES = {
+    'search': {'q': 'кофе'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку (p50/p95/p99), число запросов к базе и размер '
+        'ответа для каждого адреса posts/urls.py через тестовый клиент. '
+        'Изменения, сделанные запросами, откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--guest', action='store_true',
+            help='Запрашивать страницы без входа на сайт.'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом.'
+        )
+        parser.add_argument('--save', help='Сохранить результаты в JSON.')
+        parser.add_argument(
+            '--compare', help='Сравнить с результатами из JSON.'
+        )
+
+    def sample(self):
+        """Самые нагруженные объекты набора данных."""
+        profiles = Profile.objects.select_related('user')
+        user = profiles.order_by('-following_count', 'id').first()
+        author = profiles.order_by('-posts_count', 'id').first()
+        group = Group.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total', 'id').first()
+        post = Post.objects.order_by('-comments_count', '-id').first()
+        if None in (user, author, group, post):
+            raise CommandError(
+                'Нет данных для замеров, запустите seed_data.'
+            )
+        own_post = Post.objects.filter(author=user.user).first() or post
+        return user.user, {
+            'slug': group.slug,
+            'username': author.user.username,
+            'post_id': post.id,
+        }, own_post
+
+    def targets(self, values, own_post):
+        targets = {}
+        for pattern in urls.urlpatterns:
+            kwargs = {
+                name: values[name] for name in pattern.pattern.converters
+            }
+            if pattern.name == 'post_edit':
+                kwargs['post_id'] = own_post.id
+            targets[pattern.name] = (
+                reverse('posts:%s' % pattern.name, kwargs=kwargs),
+                QUERIES.get(pattern.name, {})
+            )
+        return targets
+
+    def measure(self, client, url, data, options):
+        for _ in range(options['warmup']):
+            client.get(url, data)
+        timings = []
+        for _ in range(options['repeat']):
+            if options['cold']:
+                cache.clear()
+            start = time.perf_counter()
+            client.get(url, data)
+            timings.append(time.perf_counter() - start)
+        if options['cold']:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, data)
+        return {
+            'status': response.status_code,
+            'p50': percentile(timings, 50) * MS,
+            'p95': percentile(timings, 95) * MS,
+            'p99': percentile(timings, 99) * MS,
+            'queries': len(queries),
+            'bytes': len(response.content),
+        }
+
+    def delta(self, value, base):
+        if not base:
+            return '%8s' % '-'
+        return '%+7.0f%%' % ((value - base) / base * 100)
+
+    def report(self, results, baseline):
+        header = '%-18s %6s %9s %9s %9s %7s %9s' % (
+            'view', 'status', 'p50', 'p95', 'p99', 'queries', 'bytes'
+        )
+        if baseline:
+            header += ' %8s %8s %7s' % ('p50 Δ', 'p95 Δ', 'sql Δ')
+        self.stdout.write(header)
+        for name, result in results.items():
+            line = '%-18s %6s %7.2fms %7.2fms %7.2fms %7s %9s' % (
+                name, result['status'], result['p50'], result['p95'],
+                result['p99'], result['queries'], result['bytes']
+            )
+            if baseline and name in baseline:
+                base = baseline[name]
+                line += ' %s %s %+7d' % (
+                    self.delta(result['p50'], base['p50']),
+                    self.delta(result['p95'], base['p95']),
+                    result['queries'] - base['queries']
+                )
+            self.stdout.write(line)
+
+    @routers.pinned()
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)['results']
+        results = {}
+        # DEBUG выключен, как на сервере: без debug toolbar и без
+        # накопления connection.queries. Лимиты записи сняты: повторные
+        # подписки и отписки иначе быстро получают 429.
+        with override_settings(
+            DEBUG=False,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            RATE_LIMITS={}
+        ), transaction.atomic():
+            user, values, own_post = self.sample()
+            client = Client()
+            if not options['guest']:
+                client.force_login(user)
+            for name, (url, data) in self.targets(values, own_post).items():
+                results[name] = self.measure(client, url, data, options)
+            transaction.set_rollback(True)
+        self.report(results, baseline)
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump({
+                    'options': {
+                        key: options[key]
+                        for key in ('repeat', 'warmup', 'guest', 'cold')
+                    },
+                    'results': results,
+                }, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import routers
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписок.'
+
+    @routers.pinned()
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = counters.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS('Исправлено счётчиков: %s' % fixed)
+        )
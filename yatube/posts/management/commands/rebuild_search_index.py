@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import routers
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов FTS5.'
+
+    @routers.pinned()
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError(
+                'Полнотекстовый индекс доступен только в SQLite.'
+            )
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Индекс перестроен'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import routers
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново раскладывает ленты подписок с учётом '
+        'TIMELINE_FANOUT_LIMIT. Счётчики подписчиков должны быть верны '
+        '(см. rebuild_counters).'
+    )
+
+    @routers.pinned()
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            entries = timeline.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS('Записей лент: %s' % entries)
+        )
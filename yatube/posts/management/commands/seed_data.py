@@ -0,0 +1,219 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core import routers
+from posts import counters, timeline
+from posts.models import Comment, Follow, Group, Post, Profile, User
+
+WORDS = (
+    'пост', 'лента', 'подписка', 'группа', 'автор', 'комментарий', 'кот',
+    'город', 'утро', 'вечер', 'поезд', 'море', 'книга', 'кофе', 'дождь',
+    'работа', 'отпуск', 'фото', 'горы', 'музыка', 'код', 'django', 'python',
+    'сегодня', 'вчера', 'снова', 'очень', 'новый', 'старый', 'первый',
+)
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Даёт bulk_create записать свои даты в поля с auto_now_add."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует воспроизводимый набор пользователей, групп, постов, '
+        'комментариев и подписок с неравномерным распределением '
+        'активности, затем пересчитывает счётчики и ленты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument('--follows', type=int, default=50000)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты публикации.'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель закона Ципфа для популярности авторов, групп '
+                 'и постов.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def weights(self, size, skew):
+        return list(accumulate(1 / (rank + 1) ** skew for rank in range(size)))
+
+    def text(self, rng, low, high):
+        return ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+    def create_users(self, options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix + '-').exists():
+            raise CommandError(
+                'Пользователи с префиксом %s уже есть, выберите другой '
+                '--prefix.' % prefix
+            )
+        password = make_password(None)
+        User.objects.bulk_create(
+            (
+                User(username='%s-%s' % (prefix, i), password=password)
+                for i in range(options['users'])
+            ),
+            batch_size=options['batch_size']
+        )
+        users = list(
+            User.objects.filter(
+                username__startswith=prefix + '-'
+            ).order_by('id').values_list('id', flat=True)
+        )
+        Profile.objects.bulk_create(
+            (Profile(user_id=user_id) for user_id in users),
+            batch_size=options['batch_size']
+        )
+        return users
+
+    def create_groups(self, options):
+        prefix = options['prefix']
+        Group.objects.bulk_create(
+            (
+                Group(
+                    title='Группа %s' % i,
+                    slug='%s-%s' % (prefix, i),
+                    description='Сгенерированная группа.'
+                ) for i in range(options['groups'])
+            ),
+            batch_size=options['batch_size']
+        )
+        return list(
+            Group.objects.filter(
+                slug__startswith=prefix + '-'
+            ).order_by('id').values_list('id', flat=True)
+        )
+
+    def create_posts(self, rng, options, users, groups, now):
+        authors = rng.choices(
+            users,
+            cum_weights=self.weights(len(users), options['skew']),
+            k=options['posts']
+        )
+        group_weights = self.weights(len(groups), options['skew'])
+        span = options['days'] * 24 * 3600
+        dates = sorted(
+            now - timedelta(seconds=rng.uniform(0, span))
+            for _ in range(options['posts'])
+        )
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            Post.objects.bulk_create(
+                (
+                    Post(
+                        text=self.text(rng, 5, 80),
+                        author_id=author_id,
+                        group_id=(
+                            rng.choices(groups, cum_weights=group_weights)[0]
+                            if groups and rng.random() < 0.7 else None
+                        ),
+                        pub_date=pub_date
+                    ) for author_id, pub_date in zip(authors, dates)
+                ),
+                batch_size=options['batch_size']
+            )
+        return list(
+            Post.objects.filter(author_id__in=users).values_list(
+                'id', 'pub_date'
+            ).order_by('id')
+        )
+
+    def create_comments(self, rng, options, users, posts, now):
+        # Обсуждают в основном немногие посты, самые обсуждаемые
+        # разбросаны по всей истории.
+        posts = posts[:]
+        rng.shuffle(posts)
+        targets = rng.choices(
+            posts,
+            cum_weights=self.weights(len(posts), options['skew']),
+            k=options['comments']
+        )
+        with explicit_dates(Comment._meta.get_field('created')):
+            Comment.objects.bulk_create(
+                (
+                    Comment(
+                        post_id=post_id,
+                        author_id=rng.choice(users),
+                        text=self.text(rng, 1, 30),
+                        created=min(
+                            now,
+                            pub_date + timedelta(
+                                seconds=rng.expovariate(1 / 3600)
+                            )
+                        )
+                    ) for post_id, pub_date in targets
+                ),
+                batch_size=options['batch_size']
+            )
+
+    def create_follows(self, rng, options, users):
+        cum_weights = self.weights(len(users), options['skew'])
+        pairs = set()
+        # Пар может не хватить, если подписок больше, чем пользователей
+        # в квадрате, поэтому число попыток ограничено.
+        for _ in range(options['follows'] * 3):
+            if len(pairs) == options['follows']:
+                break
+            user_id = rng.choice(users)
+            author_id = rng.choices(users, cum_weights=cum_weights)[0]
+            if user_id != author_id:
+                pairs.add((user_id, author_id))
+        Follow.objects.bulk_create(
+            (
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in sorted(pairs)
+            ),
+            batch_size=options['batch_size'],
+            ignore_conflicts=True
+        )
+        return len(pairs)
+
+    @routers.pinned()
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        with transaction.atomic():
+            users = self.create_users(options)
+            groups = self.create_groups(options)
+            posts = self.create_posts(rng, options, users, groups, now)
+            if posts:
+                self.create_comments(rng, options, users, posts, now)
+            follows = self.create_follows(rng, options, users)
+            counters.rebuild()
+            entries = timeline.rebuild()
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        # bulk_create не шлёт сигналов, метки версий кэша устарели.
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            'Создано: пользователей %s, групп %s, постов %s, комментариев '
+            '%s, подписок %s, записей лент %s' % (
+                len(users), len(groups), len(posts),
+                options['comments'] if posts else 0, follows, entries
+            )
+        ))
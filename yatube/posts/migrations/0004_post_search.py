@@ -0,0 +1,51 @@
+from django.db import migrations
+
+TABLE = 'posts_post_fts'
+
+SCHEMA = [
+    "CREATE VIRTUAL TABLE {table} USING fts5("
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER {table}_insert AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO {table}(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER {table}_delete AFTER DELETE ON posts_post BEGIN "
+    "INSERT INTO {table}({table}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER {table}_update AFTER UPDATE OF text ON posts_post BEGIN "
+    "INSERT INTO {table}({table}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO {table}(rowid, text) VALUES (new.id, new.text); END",
+    "INSERT INTO {table}({table}) VALUES ('rebuild')",
+]
+
+DROP = [
+    'DROP TRIGGER IF EXISTS {table}_insert',
+    'DROP TRIGGER IF EXISTS {table}_delete',
+    'DROP TRIGGER IF EXISTS {table}_update',
+    'DROP TABLE IF EXISTS {table}',
+]
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SCHEMA:
+        schema_editor.execute(sql.format(table=TABLE))
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP:
+        schema_editor.execute(sql.format(table=TABLE))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from . import versions
+from .forms import CommentForm
+from .models import Post
+from .utils import comments_page
+
+# Место формы комментария в закэшированном теле страницы поста.
+COMMENT_FORM_SLOT = '<!--comment-form-->'
+RESPONSE_KEY = 'posts:detail:response:%s:%s'
+BODY_KEY = 'posts:detail:body:%s:%s'
+
+
+def detail_scopes(request, post_id):
+    """Области версий страницы поста или None, если поста нет.
+
+    Страница зависит от поста с комментариями и от числа постов автора.
+    Число постов версионируется отдельной узкой областью
+    ``author-posts:<id>``: общую ``author:<id>`` сбрасывают и чужие
+    комментарии, и подписки.
+    Результат запоминается на запросе: его берут и ETag, и представление.
+    """
+    cached = getattr(request, '_post_detail_scopes', None)
+    if cached and cached[0] == post_id:
+        return cached[1]
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    scopes = None
+    if author_id is not None:
+        scopes = ['post:%s' % post_id, 'author-posts:%s' % author_id]
+    request._post_detail_scopes = (post_id, scopes)
+    return scopes
+
+
+def detail_version(scopes):
+    return ':'.join(versions.get(*scopes))
+
+
+def cached_response(post_id, version):
+    return cache.get(RESPONSE_KEY % (post_id, version))
+
+
+def store_response(post_id, scopes, version, content):
+    versions.set_tagged(RESPONSE_KEY % (post_id, version), content, scopes)
+
+
+def body(post_id, scopes, version):
+    """Заголовок и тело страницы поста без формы комментария."""
+    key = BODY_KEY % (post_id, version)
+    page = cache.get(key)
+    if page is not None:
+        return page
+    post = Post.objects.select_related(
+        'author__profile', 'group'
+    ).filter(pk=post_id).first()
+    if post is None:
+        return None
+    page = {
+        'post_text': post.text,
+        'body': render_to_string('posts/includes/post_detail_body.html', {
+            'post': post,
+            'comments': comments_page(post.comments.select_related('author')),
+            'comment_form_slot': COMMENT_FORM_SLOT,
+        }),
+    }
+    versions.set_tagged(key, page, scopes)
+    return page
+
+
+def fill_comment_form(request, post_id, body):
+    form = ''
+    if request.user.is_authenticated:
+        form = render_to_string(
+            'posts/includes/comment_form.html',
+            {'form': CommentForm(), 'post_id': post_id},
+            request
+        )
+    return body.replace(COMMENT_FORM_SLOT, form, 1)
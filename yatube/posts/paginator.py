@@ -0,0 +1,142 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage:
+    """Страница курсорной пагинации, совместимая с шаблоном paginator."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<CursorPage of %s items>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация от новых записей к старым.
+
+    Страница выбирается условием по полям ``ordering`` (по умолчанию
+    ``pub_date`` и ``id``) вместо OFFSET, общий COUNT(*) не выполняется.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('pub_date', 'id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    def encode_cursor(self, direction, obj):
+        values = [direction]
+        for name in self.ordering:
+            field = self.object_list.model._meta.get_field(name)
+            values.append(field.value_to_string(obj))
+        payload = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            direction, *raw = json.loads(
+                base64.urlsafe_b64decode(cursor + padding)
+            )
+        except (TypeError, ValueError, binascii.Error):
+            raise InvalidCursor(cursor)
+        if direction not in (NEXT, PREVIOUS) or (
+            len(raw) != len(self.ordering)
+        ):
+            raise InvalidCursor(cursor)
+        values = []
+        for name, value in zip(self.ordering, raw):
+            field = self.object_list.model._meta.get_field(name)
+            try:
+                values.append(field.to_python(value))
+            except ValidationError:
+                raise InvalidCursor(cursor)
+        if None in values:
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def _seek(self, values, lookup, position=0):
+        # (a, b) < (x, y) раскрывается как a <= x AND (a < x OR b < y):
+        # условие по первому полю остаётся диапазоном по индексу.
+        name, value = self.ordering[position], values[position]
+        if position == len(self.ordering) - 1:
+            return Q(**{'%s__%s' % (name, lookup): value})
+        return Q(**{'%s__%se' % (name, lookup): value}) & (
+            Q(**{'%s__%s' % (name, lookup): value})
+            | self._seek(values, lookup, position + 1)
+        )
+
+    def page(self, cursor=None):
+        descending = ['-' + name for name in self.ordering]
+        if not cursor:
+            rows = list(
+                self.object_list.order_by(*descending)[:self.per_page + 1]
+            )
+            has_next, has_previous = len(rows) > self.per_page, False
+        else:
+            direction, values = self.decode_cursor(cursor)
+            if direction == NEXT:
+                rows = list(
+                    self.object_list.filter(
+                        self._seek(values, 'lt')
+                    ).order_by(*descending)[:self.per_page + 1]
+                )
+                has_next, has_previous = len(rows) > self.per_page, True
+            else:
+                rows = list(
+                    self.object_list.filter(
+                        self._seek(values, 'gt')
+                    ).order_by(*self.ordering)[:self.per_page + 1]
+                )
+                has_next = True
+                has_previous = len(rows) > self.per_page
+                rows = rows[:self.per_page][::-1]
+        rows = rows[:self.per_page]
+        if not rows:
+            return CursorPage(rows, self, None, None)
+        return CursorPage(
+            rows,
+            self,
+            self.encode_cursor(NEXT, rows[-1]) if has_next else None,
+            self.encode_cursor(PREVIOUS, rows[0]) if has_previous else None
+        )
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
@@ -0,0 +1,50 @@
+import re
+
+from django.db import connection
+
+from .models import Post
+
+TABLE = 'posts_post_fts'
+
+
+def is_supported(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def match_expression(text):
+    """Превращает пользовательский ввод в безопасный запрос FTS5:
+    каждое слово ищется как префикс, все слова обязательны."""
+    return ' '.join('"%s"*' % word for word in re.findall(r'\w+', text))
+
+
+def search(queryset, text):
+    """Посты, подходящие под запрос, от более релевантных к менее."""
+    expression = match_expression(text)
+    if not expression:
+        return queryset.none()
+    if not is_supported():
+        return queryset.filter(text__icontains=text)
+    return queryset.extra(
+        tables=[TABLE],
+        where=[
+            '%s.rowid = %s.id' % (TABLE, Post._meta.db_table),
+            '%s MATCH %%s' % TABLE,
+        ],
+        params=[expression],
+        select={'search_rank': '%s.rank' % TABLE},
+        order_by=['search_rank', '-pub_date'],
+    )
+
+
+def rebuild():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO {table}({table}) VALUES ('rebuild')".format(
+                table=TABLE
+            )
+        )
+        cursor.execute(
+            "INSERT INTO {table}({table}) VALUES ('optimize')".format(
+                table=TABLE
+            )
+        )
@@ -0,0 +1,154 @@
+import threading
+
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from . import counters, follows, timeline, versions
+from .models import Comment, Follow, Group, Post, Profile, User
+
+# id постов, которые сейчас удаляются вместе с комментариями.
+_deleting = threading.local()
+
+
+def deleting_posts():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = set()
+    return _deleting.posts
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, **kwargs):
+    if created:
+        Profile.objects.get_or_create(user=instance)
+
+
+def bump_comment_scopes(comment):
+    post = Post.objects.filter(pk=comment.post_id).only(
+        'author_id', 'group_id'
+    ).first()
+    versions.bump(
+        'post:%s' % comment.post_id,
+        *(versions.post_scopes(post) if post else [])
+    )
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    versions.bump('group:%s' % instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance.old_group_id = instance.pk and Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    scopes = ['post:%s' % instance.pk, *versions.post_scopes(instance)]
+    if getattr(instance, 'old_group_id', None):
+        scopes.append('group:%s' % instance.old_group_id)
+    if created:
+        scopes.append('author-posts:%s' % instance.author_id)
+    versions.bump(*scopes)
+    if created:
+        counters.change(
+            Profile.objects.filter(user_id=instance.author_id),
+            'posts_count', 1
+        )
+        timeline.fan_out(instance)
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    # Каскад шлёт pre_delete всех объектов до удаления комментариев.
+    deleting_posts().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    deleting_posts().discard(instance.pk)
+    versions.bump(
+        'post:%s' % instance.pk,
+        'author-posts:%s' % instance.author_id,
+        *versions.post_scopes(instance)
+    )
+    counters.change(
+        Profile.objects.filter(user_id=instance.author_id),
+        'posts_count', -1
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    bump_comment_scopes(instance)
+    if created:
+        counters.change(
+            Post.objects.filter(pk=instance.post_id), 'comments_count', 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.post_id in deleting_posts():
+        # Пост удаляется сам: счётчик уйдёт вместе с ним, области
+        # сбросит post_deleted.
+        return
+    bump_comment_scopes(instance)
+    counters.change(
+        Post.objects.filter(pk=instance.post_id), 'comments_count', -1
+    )
+
+
+def forget_following(follow):
+    follows.forget(
+        follow.user_id,
+        follow.user if Follow.user.is_cached(follow) else None
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    versions.bump(
+        'author:%s' % instance.author_id,
+        'author:%s' % instance.user_id,
+        'following:%s' % instance.user_id
+    )
+    forget_following(instance)
+    if created:
+        counters.change(
+            Profile.objects.filter(user_id=instance.author_id),
+            'followers_count', 1
+        )
+        counters.change(
+            Profile.objects.filter(user_id=instance.user_id),
+            'following_count', 1
+        )
+        timeline.followers_changed(instance.author_id, 1)
+        timeline.backfill(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    versions.bump(
+        'author:%s' % instance.author_id,
+        'author:%s' % instance.user_id,
+        'following:%s' % instance.user_id
+    )
+    forget_following(instance)
+    counters.change(
+        Profile.objects.filter(user_id=instance.author_id),
+        'followers_count', -1
+    )
+    counters.change(
+        Profile.objects.filter(user_id=instance.user_id),
+        'following_count', -1
+    )
+    timeline.remove(instance.user_id, instance.author_id)
+    timeline.followers_changed(instance.author_id, -1)
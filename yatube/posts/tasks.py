@@ -0,0 +1,16 @@
+from tasks.queue import task
+
+from . import thumbnails, timeline, versions
+
+
+@task('posts.thumbnail')
+def thumbnail(post_id, name):
+    """Миниатюра картинки поста; карточка поста перерисуется с ней."""
+    thumbnails.generate(name)
+    versions.bump('post:%s' % post_id)
+
+
+@task('posts.sync_author_timelines')
+def sync_author_timelines(author_id):
+    """Ленты подписчиков автора после пересечения лимита раздачи."""
+    timeline.sync_author(author_id)
@@ -0,0 +1,138 @@
+import re
+from urllib.parse import quote
+
+from django import template
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from posts import follows, thumbnails
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+# Подходит под любой конвертер пути: str, slug и int.
+PLACEHOLDER = '2718281828'
+# Те же символы, что reverse() оставляет в пути без кодирования.
+SAFE_CHARS = "!$&'()*+,;=/~:@"
+# Место кнопки подписки в карточке: id и имя автора. Карточки
+# и списки кэшируются общими для всех, кнопка вставляется под запрос.
+FOLLOW_SLOT = re.compile(r'<!--follow:(\d+):([\w.@+-]+)-->')
+FOLLOW_BUTTON = (
+    '<a class="btn btn-sm {}" href="{}" role="button">{}</a>'
+)
+
+
+class UrlPattern:
+    """Адрес с одним параметром, построенный reverse() один раз."""
+
+    def __init__(self, name):
+        self.prefix, self.suffix = reverse(
+            name, args=[PLACEHOLDER]
+        ).split(PLACEHOLDER)
+
+    def __call__(self, value):
+        return self.prefix + quote(str(value), safe=SAFE_CHARS) + self.suffix
+
+
+@register.simple_tag
+def post_thumbnail(image):
+    return thumbnails.lookup(image)
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, show_group=True):
+    """Карточки постов списка.
+
+    Шаблон карточки компилируется один раз, адреса строятся по префиксам
+    без reverse() на каждый пост, а кэш карточек читается и пишется одним
+    запросом на всю страницу. Карточка кэшируется по ``post.cache_version``
+    (см. ``versions.page_context``).
+    """
+    posts = list(posts)
+    keys = [
+        make_template_fragment_key(
+            'post_card', [post.id, post.cache_version, show_group]
+        ) if hasattr(post, 'cache_version') else None
+        for post in posts
+    ]
+    cached = cache.get_many([key for key in keys if key])
+    card = context.template.engine.get_template(CARD_TEMPLATE)
+    urls = {}
+    fresh = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        if key in cached:
+            cards.append(cached[key])
+            continue
+        if not urls:
+            urls = {
+                name: UrlPattern('posts:' + name)
+                for name in ('profile', 'group_list', 'post_detail')
+            }
+        with context.push(
+            post=post,
+            author_url=urls['profile'](post.author.username),
+            group_url=(
+                urls['group_list'](post.group.slug)
+                if post.group and show_group else None
+            ),
+            post_url=urls['post_detail'](post.id),
+            thumbnail=thumbnails.lookup(post.image)
+        ):
+            html = card.render(context)
+        cards.append(html)
+        if key:
+            fresh[key] = html
+    if fresh:
+        cache.set_many(fresh, None)
+    return mark_safe(''.join(cards))
+
+
+class FollowButtonsNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        html = self.nodelist.render(context)
+        request = context.get('request')
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return mark_safe(FOLLOW_SLOT.sub('', html))
+        author_ids = {int(match[0]) for match in FOLLOW_SLOT.findall(html)}
+        if not author_ids:
+            return html
+        following = follows.are_following(user, author_ids)
+        follow_url = UrlPattern('posts:profile_follow')
+        unfollow_url = UrlPattern('posts:profile_unfollow')
+
+        def button(match):
+            author_id, username = int(match.group(1)), match.group(2)
+            if author_id == user.pk:
+                return ''
+            if following[author_id]:
+                return format_html(
+                    FOLLOW_BUTTON, 'btn-light', unfollow_url(username),
+                    'Отписаться'
+                )
+            return format_html(
+                FOLLOW_BUTTON, 'btn-primary', follow_url(username),
+                'Подписаться'
+            )
+
+        return mark_safe(FOLLOW_SLOT.sub(button, html))
+
+
+@register.tag
+def follow_buttons(parser, token):
+    """Вставляет кнопки подписки в карточки постов внутри блока.
+
+    Подписки пользователя на всех авторов блока проверяются одним
+    обращением к набору ``follows.following_ids``, без запросов к базе
+    при тёплом кэше.
+    """
+    nodelist = parser.parse(('endfollow_buttons',))
+    parser.delete_first_token()
+    return FollowButtonsNode(nodelist)
@@ -0,0 +1,146 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..admin import PostAdmin
+from ..models import Comment, Post, Profile
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+        cls.author = User.objects.create_user(username='Author')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_post_counters(self):
+        CountersTests.author_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Тестовый текст поста.'}
+        )
+        post = Post.objects.get()
+        self.assertEqual(self.profile(CountersTests.author).posts_count, 1)
+        CountersTests.user_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.id}),
+            data={'text': 'Тестовый комментарий.'}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        Comment.objects.get().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        self.assertEqual(self.profile(CountersTests.author).posts_count, 0)
+
+    def test_follow_counters(self):
+        follow = reverse(
+            'posts:profile_follow',
+            kwargs={'username': CountersTests.author}
+        )
+        CountersTests.user_client.get(follow)
+        CountersTests.user_client.get(follow)
+        self.assertEqual(
+            self.profile(CountersTests.author).followers_count, 1
+        )
+        self.assertEqual(self.profile(CountersTests.user).following_count, 1)
+        CountersTests.user_client.get(
+            reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': CountersTests.author}
+            )
+        )
+        self.assertEqual(
+            self.profile(CountersTests.author).followers_count, 0
+        )
+        self.assertEqual(self.profile(CountersTests.user).following_count, 0)
+
+    def test_rebuild_counters(self):
+        Post.objects.bulk_create(
+            Post(text='Тестовый текст поста.', author=CountersTests.author)
+            for i in range(3)
+        )
+        Profile.objects.filter(user=CountersTests.user).delete()
+        self.assertEqual(self.profile(CountersTests.author).posts_count, 0)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertEqual(self.profile(CountersTests.author).posts_count, 3)
+        self.assertTrue(
+            Profile.objects.filter(user=CountersTests.user).exists()
+        )
+
+    def test_edit_keeps_comments_count(self):
+        post = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=CountersTests.author
+        )
+        # Комментарий появляется, пока пост открыт на редактирование.
+        stale = Post.objects.get(pk=post.pk)
+        Comment.objects.create(
+            post=post,
+            author=CountersTests.user,
+            text='Тестовый комментарий.'
+        )
+        with mock.patch('posts.views.get_object_or_404', return_value=stale):
+            CountersTests.author_client.post(
+                reverse('posts:post_edit', kwargs={'post_id': post.id}),
+                data={'text': 'Изменённый текст.'}
+            )
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Изменённый текст.')
+        self.assertEqual(post.comments_count, 1)
+        stale.text = 'Правка в админке.'
+        PostAdmin(Post, admin.site).save_model(
+            None, stale, mock.Mock(changed_data=['text']), True
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Правка в админке.')
+        self.assertEqual(post.comments_count, 1)
+
+    def test_post_delete_queries_independent_of_comments(self):
+        queries = []
+        for comments in (1, 10):
+            post = Post.objects.create(
+                text='Тестовый текст поста.',
+                author=CountersTests.author
+            )
+            Comment.objects.bulk_create(
+                Comment(
+                    post=post,
+                    author=CountersTests.user,
+                    text='Тестовый комментарий.'
+                ) for _ in range(comments)
+            )
+            with CaptureQueriesContext(connection) as captured:
+                post.delete()
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(self.profile(CountersTests.author).posts_count, 0)
+        other = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=CountersTests.author
+        )
+        commenter = User.objects.create_user(username='Commenter')
+        Comment.objects.create(
+            post=other,
+            author=commenter,
+            text='Тестовый комментарий.'
+        )
+        # Комментарии удалённого пользователя к чужим постам считаются.
+        commenter.delete()
+        other.refresh_from_db()
+        self.assertEqual(other.comments_count, 0)
@@ -0,0 +1,136 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import routers
+from .. import versions
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Описание...'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=cls.author,
+            group=cls.group
+        )
+        cls.urls = [
+            reverse('posts:index'),
+            reverse(
+                'posts:group_list',
+                kwargs={'slug': cls.group.slug}
+            ),
+            reverse(
+                'posts:profile',
+                kwargs={'username': cls.author}
+            ),
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': cls.post.id}
+            ),
+        ]
+
+    def revalidate(self, client, url):
+        etag = client.get(url)['ETag']
+        return etag, client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified(self):
+        for client in (
+            ConditionalGetTests.guest_client,
+            ConditionalGetTests.user_client
+        ):
+            for url in ConditionalGetTests.urls:
+                with self.subTest(url=url):
+                    etag, response = self.revalidate(client, url)
+                    self.assertEqual(response.status_code, 304)
+                    self.assertEqual(response.content, b'')
+                    self.assertIn('Cookie', response['Vary'])
+
+    def test_etag_depends_on_user(self):
+        for url in ConditionalGetTests.urls:
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    ConditionalGetTests.guest_client.get(url)['ETag'],
+                    ConditionalGetTests.user_client.get(url)['ETag']
+                )
+
+    def test_changes_invalidate_etag(self):
+        changes = [
+            lambda: Comment.objects.create(
+                post=ConditionalGetTests.post,
+                author=ConditionalGetTests.user,
+                text='Комментарий.'
+            ),
+            lambda: Post.objects.create(
+                text='Новый пост.',
+                author=ConditionalGetTests.author,
+                group=ConditionalGetTests.group
+            ),
+        ]
+        for change in changes:
+            etags = [
+                ConditionalGetTests.user_client.get(url)['ETag']
+                for url in ConditionalGetTests.urls
+            ]
+            change()
+            for url, etag in zip(ConditionalGetTests.urls, etags):
+                with self.subTest(url=url):
+                    response = ConditionalGetTests.user_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                    self.assertEqual(response.status_code, 200)
+
+    def test_follow_invalidates_profile(self):
+        url = reverse(
+            'posts:profile',
+            kwargs={'username': ConditionalGetTests.author}
+        )
+        etag = ConditionalGetTests.user_client.get(url)['ETag']
+        Follow.objects.create(
+            user=ConditionalGetTests.user,
+            author=ConditionalGetTests.author
+        )
+        response = ConditionalGetTests.user_client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['following'])
+
+
+class VersionBumpTests(TestCase):
+    @mock.patch('posts.versions.transaction.on_commit')
+    def test_bump_repeated_after_commit(self, on_commit):
+        versions.get('index')
+        versions.bump('index')
+        # Параллельный запрос до коммита создаёт новую метку.
+        stale = versions.get('index')
+        on_commit.call_args[0][0]()
+        self.assertNotEqual(versions.get('index'), stale)
+
+    @override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=10)
+    @mock.patch('posts.versions.time.time', return_value=1000.0)
+    def test_young_stamp_not_shared_with_replica_reads(self, now):
+        # Реплика может ещё не видеть изменение, сбросившее метку.
+        first, second = versions.get('index'), versions.get('index')
+        self.assertNotEqual(first, second)
+        with routers.pinned():
+            stamp = versions.get('index')
+            self.assertEqual(versions.get('index'), stamp)
+        now.return_value = 1011.0
+        self.assertEqual(versions.get('index'), stamp)
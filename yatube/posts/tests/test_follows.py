@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follows
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.followed = User.objects.create_user(username='Followed')
+        cls.other = User.objects.create_user(username='Other')
+        Follow.objects.create(user=cls.user, author=cls.followed)
+        for author in (cls.user, cls.followed, cls.other):
+            Post.objects.create(
+                text='Пост автора %s' % author.username,
+                author=author
+            )
+
+    def setUp(self):
+        self.user_client = Client()
+        self.user_client.force_login(FollowGraphTests.user)
+
+    def fresh_user(self):
+        return User.objects.get(pk=FollowGraphTests.user.pk)
+
+    def test_loaded_with_one_query_then_cached(self):
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            ids = follows.following_ids(user)
+        self.assertEqual(ids, {FollowGraphTests.followed.id})
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            follows.following_ids(user)
+            follows.is_following(user, FollowGraphTests.followed.id)
+
+    def test_are_following(self):
+        followed = FollowGraphTests.followed.id
+        other = FollowGraphTests.other.id
+        self.assertEqual(
+            follows.are_following(self.fresh_user(), [followed, other]),
+            {followed: True, other: False}
+        )
+
+    def test_guest_follows_nobody(self):
+        guest = self.client.get(reverse('posts:index')).wsgi_request.user
+        with self.assertNumQueries(0):
+            self.assertEqual(follows.following_ids(guest), frozenset())
+
+    def test_follow_and_unfollow_keep_set_current(self):
+        other = FollowGraphTests.other
+        user = self.fresh_user()
+        self.assertFalse(follows.is_following(user, other.id))
+        self.user_client.get(
+            reverse('posts:profile_follow', args=[other.username])
+        )
+        self.assertTrue(follows.is_following(self.fresh_user(), other.id))
+        self.user_client.get(
+            reverse('posts:profile_unfollow', args=[other.username])
+        )
+        self.assertFalse(follows.is_following(self.fresh_user(), other.id))
+
+    def test_follow_again_skips_database_writes(self):
+        follows.following_ids(self.fresh_user())
+        with CaptureQueriesContext(connection) as queries:
+            self.user_client.get(reverse(
+                'posts:profile_follow',
+                args=[FollowGraphTests.followed.username]
+            ))
+        self.assertFalse([
+            query for query in queries if 'posts_follow' in query['sql']
+        ])
+
+    def test_card_buttons(self):
+        html = self.user_client.get(
+            reverse('posts:index')
+        ).content.decode()
+        self.assertIn(reverse(
+            'posts:profile_unfollow',
+            args=[FollowGraphTests.followed.username]
+        ), html)
+        self.assertIn(reverse(
+            'posts:profile_follow', args=[FollowGraphTests.other.username]
+        ), html)
+        self.assertNotIn(reverse(
+            'posts:profile_follow', args=[FollowGraphTests.user.username]
+        ), html)
+        self.assertNotIn('<!--follow:', html)
+
+    def test_guest_sees_no_buttons(self):
+        html = self.client.get(reverse('posts:index')).content.decode()
+        self.assertNotIn('Подписаться', html)
+        self.assertNotIn('<!--follow:', html)
+
+    def test_card_buttons_without_follow_queries(self):
+        self.user_client.get(reverse('posts:index'))
+        with CaptureQueriesContext(connection) as queries:
+            self.user_client.get(reverse('posts:index'))
+        self.assertFalse([
+            query for query in queries if 'posts_follow' in query['sql']
+        ])
+
+    def test_follow_changes_list_etag(self):
+        url = reverse('posts:index')
+        etag = self.user_client.get(url)['ETag']
+        self.user_client.get(reverse(
+            'posts:profile_follow', args=[FollowGraphTests.other.username]
+        ))
+        self.assertNotEqual(self.user_client.get(url)['ETag'], etag)
@@ -1,11 +1,13 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from ..models import Post, Comment
 
@@ -87,6 +89,63 @@ class PostCreateFormTests(TestCase):
         self.check_post_form(Post.objects.last(), form_data)
 
 
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_MAX_SIZE=(100, 100),
+    POST_IMAGE_MAX_PIXELS=1_000_000
+)
+class PostImageFormTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def make_jpeg(self, size):
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        content = BytesIO()
+        Image.new('RGB', size, 'red').save(content, 'JPEG', exif=exif)
+        return SimpleUploadedFile(
+            name='photo.jpeg',
+            content=content.getvalue(),
+            content_type='image/jpeg'
+        )
+
+    def test_image_normalized(self):
+        PostImageFormTests.author_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Тестовый текст поста.',
+                'image': self.make_jpeg((400, 200))
+            }
+        )
+        post = Post.objects.get()
+        self.assertEqual(post.image.name, 'posts/photo.jpg')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertNotIn('exif', image.info)
+
+    def test_image_too_large(self):
+        response = PostImageFormTests.author_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Тестовый текст поста.',
+                'image': self.make_jpeg((2000, 1000))
+            }
+        )
+        self.assertFalse(Post.objects.exists())
+        self.assertFormError(
+            response, 'form', 'image', 'Изображение слишком большое.'
+        )
+
+
 class CommentFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post
+from ..paginator import CursorPaginator
+from ..timeline import TRIM_SQL, Feed
+
+User = get_user_model()
+
+
+class IndexesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Описание...'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=cls.author,
+            group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.post,
+            author=cls.user,
+            text='Комментарий.'
+        )
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn('USING', plan)
+        self.assertIn(index, plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_feed_queries_use_indexes(self):
+        queries = {
+            'post_author_pub_date': (
+                IndexesTests.author.posts.all(),
+                IndexesTests.author.posts.order_by('-pub_date', '-id'),
+                IndexesTests.author.posts.order_by('pub_date', 'id'),
+            ),
+            'post_group_pub_date': (
+                IndexesTests.group.posts.all(),
+                IndexesTests.group.posts.order_by('-pub_date', '-id'),
+            ),
+            'comment_post_created': (
+                IndexesTests.post.comments.all(),
+                IndexesTests.post.comments.order_by('-created', '-id'),
+            ),
+            'pub_date': (
+                Post.objects.all(),
+                Post.objects.order_by('-pub_date', '-id'),
+            ),
+            'sqlite_autoindex_posts_follow': (
+                Follow.objects.filter(
+                    user=IndexesTests.user,
+                    author=IndexesTests.author
+                ),
+            ),
+        }
+        for index, querysets in queries.items():
+            for queryset in querysets:
+                with self.subTest(query=str(queryset.query)):
+                    self.assertUsesIndex(queryset[:10], index)
+
+    def test_follow_feed_uses_indexes(self):
+        feed = Feed(IndexesTests.user, [IndexesTests.author.id])
+        seek = CursorPaginator(feed, 10)._seek(
+            [IndexesTests.post.pub_date, IndexesTests.post.id], 'lt'
+        )
+        for feed in (feed, feed.filter(seek), feed.order_by('pub_date')):
+            entries, posts = feed.sources()
+            with self.subTest(descending=feed.descending, seek=feed.condition):
+                self.assertUsesIndex(entries[:10], 'timeline_user_pub_date')
+                self.assertUsesIndex(posts[:10], 'post_author_pub_date')
+
+    def test_timeline_trim_uses_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN ' + TRIM_SQL.format(
+                    table='posts_timelineentry', users='%s'
+                ),
+                [IndexesTests.user.id, 10]
+            )
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('timeline_user_pub_date', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_follow_unique(self):
+        Follow.objects.create(
+            user=IndexesTests.user,
+            author=IndexesTests.author
+        )
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Follow.objects.create(
+                    user=IndexesTests.user,
+                    author=IndexesTests.author
+                )
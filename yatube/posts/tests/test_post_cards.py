@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template import Context, Template
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..templatetags.post_tags import UrlPattern
+
+User = get_user_model()
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='au.thor+1@x-y_z')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Описание...'
+        )
+        Post.objects.bulk_create(
+            Post(
+                text='Тестовый текст поста %s.' % i,
+                author=cls.author,
+                group=cls.group if i % 2 else None
+            ) for i in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.posts = list(
+            Post.objects.select_related('author', 'group').order_by('id')
+        )
+
+    def render(self, show_group=True):
+        return Template(
+            '{% load post_tags %}{% post_cards posts show_group=flag %}'
+        ).render(Context({'posts': self.posts, 'flag': show_group}))
+
+    def test_url_pattern(self):
+        values = {
+            'posts:profile': PostCardsTests.author.username,
+            'posts:group_list': PostCardsTests.group.slug,
+            'posts:post_detail': self.posts[0].id,
+        }
+        for name, value in values.items():
+            with self.subTest(name=name):
+                self.assertEqual(
+                    UrlPattern(name)(value), reverse(name, args=[value])
+                )
+
+    def test_cards(self):
+        html = self.render()
+        self.assertEqual(html.count('class="card my-4 shadow"'), 3)
+        for post in self.posts:
+            with self.subTest(post=post.id):
+                self.assertIn(post.text, html)
+                self.assertIn(
+                    'href="%s"' % reverse(
+                        'posts:post_detail', args=[post.id]
+                    ),
+                    html
+                )
+        self.assertIn(
+            'href="%s"' % reverse(
+                'posts:profile', args=[PostCardsTests.author.username]
+            ),
+            html
+        )
+        group_url = reverse('posts:group_list', args=['test-slug'])
+        self.assertEqual(html.count(group_url), 1)
+        self.assertNotIn(group_url, self.render(show_group=False))
+
+    def test_cards_cached(self):
+        for post in self.posts:
+            post.cache_version = 'v1'
+        html = self.render()
+        key = make_template_fragment_key(
+            'post_card', [self.posts[0].id, 'v1', True]
+        )
+        self.assertIn(cache.get(key), html)
+        cache.set(key, '<p>из кэша</p>', None)
+        self.assertIn('<p>из кэша</p>', self.render())
+        self.posts[0].cache_version = 'v2'
+        self.assertNotIn('<p>из кэша</p>', self.render())
@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import pages
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class PostDetailCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+        cls.author = User.objects.create_user(username='Author')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.user = User.objects.create_user(username='NoName')
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=PostDetailCacheTests.author
+        )
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}
+        )
+
+    def test_guest_response_cached(self):
+        first = PostDetailCacheTests.guest_client.get(self.url)
+        # Остаётся только поиск автора поста для версии страницы.
+        with self.assertNumQueries(1):
+            second = PostDetailCacheTests.guest_client.get(self.url)
+        self.assertEqual(first.content, second.content)
+        self.assertNotContains(second, 'Добавить комментарий')
+
+    def test_comment_form_filled_per_user(self):
+        PostDetailCacheTests.guest_client.get(self.url)
+        response = PostDetailCacheTests.user_client.get(self.url)
+        self.assertContains(response, 'Добавить комментарий')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertContains(
+            response,
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id})
+        )
+        self.assertContains(response, 'Пользователь:  NoName')
+        self.assertNotContains(
+            PostDetailCacheTests.guest_client.get(self.url),
+            'csrfmiddlewaretoken'
+        )
+
+    def test_invalidated_by_edit(self):
+        PostDetailCacheTests.guest_client.get(self.url)
+        PostDetailCacheTests.author_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Исправленный текст.'}
+        )
+        self.assertContains(
+            PostDetailCacheTests.guest_client.get(self.url),
+            'Исправленный текст.'
+        )
+
+    def test_invalidated_by_comment(self):
+        PostDetailCacheTests.guest_client.get(self.url)
+        PostDetailCacheTests.user_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            data={'text': 'Новый комментарий.'}
+        )
+        self.assertContains(
+            PostDetailCacheTests.guest_client.get(self.url),
+            'Новый комментарий.'
+        )
+
+    def test_invalidated_by_delete(self):
+        PostDetailCacheTests.guest_client.get(self.url)
+        self.post.delete()
+        response = PostDetailCacheTests.guest_client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_other_posts_keep_cache(self):
+        PostDetailCacheTests.guest_client.get(self.url)
+        other = Post.objects.create(
+            text='Другой пост.', author=PostDetailCacheTests.user
+        )
+        other.text = 'Правка другого поста.'
+        other.save()
+        with self.assertNumQueries(1):
+            PostDetailCacheTests.guest_client.get(self.url)
+
+    def test_author_activity_keeps_cache(self):
+        other = Post.objects.create(
+            text='Другой пост автора.', author=PostDetailCacheTests.author
+        )
+        PostDetailCacheTests.guest_client.get(self.url)
+        Comment.objects.create(
+            post=other, author=PostDetailCacheTests.user, text='Комментарий.'
+        )
+        Follow.objects.create(
+            user=PostDetailCacheTests.user, author=PostDetailCacheTests.author
+        )
+        with self.assertNumQueries(1):
+            PostDetailCacheTests.guest_client.get(self.url)
+        # Новый пост автора меняет число его постов на странице.
+        Post.objects.create(
+            text='Ещё пост.', author=PostDetailCacheTests.author
+        )
+        # Автор поста, сам пост и страница комментариев.
+        with self.assertNumQueries(3):
+            PostDetailCacheTests.guest_client.get(self.url)
+
+    def test_stale_pages_removed(self):
+        PostDetailCacheTests.guest_client.get(self.url)
+        scopes = [
+            'post:%s' % self.post.id,
+            'author-posts:%s' % self.post.author_id
+        ]
+        key = pages.RESPONSE_KEY % (
+            self.post.id, pages.detail_version(scopes)
+        )
+        self.assertIsNotNone(cache.get(key))
+        self.post.save()
+        self.assertIsNone(cache.get(key))
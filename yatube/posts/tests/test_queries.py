@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Описание...'
+        )
+        cls.authors = [
+            User.objects.create_user(username='Author%s' % i)
+            for i in range(3)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.user, author=author)
+        cls.posts = [
+            Post.objects.create(
+                text='Тестовый текст поста.',
+                author=cls.authors[i % 3],
+                group=cls.group
+            ) for i in range(12)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.bulk_create(
+            Comment(
+                post=cls.post,
+                author=cls.authors[i % 3],
+                text='Тестовый комментарий.'
+            ) for i in range(15)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_views_query_count(self):
+        # Сессия и пользователь запроса, поиск объекта для ETag
+        # и запросы самой страницы. Подписки пользователя читаются
+        # из базы один раз, дальше - из кэша.
+        pages_queries = {
+            reverse('posts:index'): 5,
+            reverse(
+                'posts:group_list',
+                kwargs={'slug': QueryCountTests.group.slug}
+            ): 6,
+            reverse(
+                'posts:profile',
+                kwargs={'username': QueryCountTests.authors[0]}
+            ): 6,
+            reverse('posts:follow_index'): 6,
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': QueryCountTests.post.id}
+            ): 5,
+        }
+        for page, queries in pages_queries.items():
+            with self.subTest(page=page):
+                with self.assertNumQueries(queries):
+                    QueryCountTests.user_client.get(page)
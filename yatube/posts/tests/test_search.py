@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..search import match_expression, search
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.admin = User.objects.create_superuser(
+            username='Admin', email='admin@yatube.ru', password='admin'
+        )
+        cls.admin_client = Client()
+        cls.admin_client.force_login(cls.admin)
+        cls.rare = Post.objects.create(
+            text='Утка вышла погулять.',
+            author=cls.user
+        )
+        cls.often = Post.objects.create(
+            text='Утка, утка и ещё раз утка.',
+            author=cls.user
+        )
+        Post.objects.create(text='Совсем другой пост.', author=cls.user)
+
+    def found(self, text):
+        return list(search(Post.objects.all(), text))
+
+    def test_match_expression(self):
+        self.assertEqual(match_expression('утка "OR" -x'), (
+            '"утка"* "OR"* "x"*'
+        ))
+        self.assertEqual(match_expression('  ** '), '')
+
+    def test_search_ranked(self):
+        self.assertEqual(
+            self.found('утка'),
+            [SearchTests.often, SearchTests.rare]
+        )
+        self.assertEqual(self.found('погул'), [SearchTests.rare])
+        self.assertEqual(self.found(''), [])
+
+    def test_index_follows_changes(self):
+        post = Post.objects.get(pk=SearchTests.rare.pk)
+        post.text = 'Гусь вышел погулять.'
+        post.save()
+        self.assertEqual(self.found('гусь'), [post])
+        self.assertEqual(self.found('утка'), [SearchTests.often])
+        Post.objects.filter(pk=SearchTests.often.pk).delete()
+        self.assertEqual(self.found('утка'), [])
+
+    def test_search_page(self):
+        response = SearchTests.guest_client.get(
+            reverse('posts:search'), {'q': 'утка'}
+        )
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [SearchTests.often, SearchTests.rare]
+        )
+
+    def test_admin_search(self):
+        response = SearchTests.admin_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'погулять'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list),
+            [SearchTests.rare]
+        )
+
+    def test_rebuild_command(self):
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertEqual(self.found('погулять'), [SearchTests.rare])
@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import counters
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+
+SIZES = {
+    'users': 30,
+    'groups': 4,
+    'posts': 300,
+    'comments': 500,
+    'follows': 80,
+}
+
+
+class SeedDataTests(TestCase):
+    def seed(self, **options):
+        call_command('seed_data', stdout=StringIO(), **{**SIZES, **options})
+
+    def test_dataset(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), SIZES['users'])
+        self.assertEqual(Group.objects.count(), SIZES['groups'])
+        self.assertEqual(Post.objects.count(), SIZES['posts'])
+        self.assertEqual(Comment.objects.count(), SIZES['comments'])
+        self.assertEqual(Follow.objects.count(), SIZES['follows'])
+        self.assertEqual(counters.rebuild(), 0)
+        self.assertTrue(TimelineEntry.objects.exists())
+        first = Post.objects.order_by('pub_date').first()
+        last = Post.objects.order_by('pub_date').last()
+        self.assertGreater(last.pub_date - first.pub_date, timedelta(days=30))
+
+    def test_skew(self):
+        self.seed()
+        posts = sorted(
+            User.objects.values_list('profile__posts_count', flat=True),
+            reverse=True
+        )
+        # Три самых активных автора из 30 пишут больше трети постов.
+        self.assertGreater(sum(posts[:3]), SIZES['posts'] / 3)
+
+    def test_reproducible(self):
+        self.seed(prefix='one')
+        first = list(
+            Post.objects.order_by('id').values_list('text', flat=True)
+        )
+        self.seed(prefix='two')
+        second = list(
+            Post.objects.order_by('id').values_list('text', flat=True)
+        )[len(first):]
+        self.assertEqual(first, second)
+
+
+class BenchViewsTests(TestCase):
+    def test_baseline(self):
+        call_command('seed_data', stdout=StringIO(), **SIZES)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            call_command(
+                'bench_views', repeat=2, warmup=0, save=path,
+                stdout=StringIO()
+            )
+            with open(path) as file:
+                results = json.load(file)['results']
+            self.assertEqual(results['index']['status'], 200)
+            self.assertGreater(results['index']['bytes'], 0)
+            self.assertGreater(results['post_detail']['queries'], 0)
+            out = StringIO()
+            call_command(
+                'bench_views', repeat=2, warmup=0, compare=path, stdout=out
+            )
+        self.assertIn('p95 Δ', out.getvalue())
+        self.assertEqual(Post.objects.count(), SIZES['posts'])
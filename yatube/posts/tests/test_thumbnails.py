@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from tasks import worker
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='photo.png'):
+    content = BytesIO()
+    Image.new('RGB', (40, 20), 'red').save(content, 'PNG')
+    return SimpleUploadedFile(
+        name=name,
+        content=content.getvalue(),
+        content_type='image/png'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username='NoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=ThumbnailTests.user,
+            image=make_image()
+        )
+
+    def test_render_does_not_generate(self):
+        response = ThumbnailTests.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, self.post.image.url)
+        self.assertIsNone(thumbnails.lookup(self.post.image))
+
+    def test_generated_thumbnail_used(self):
+        ThumbnailTests.guest_client.get(reverse('posts:index'))
+        thumbnails.schedule(self.post)
+        worker.work(once=True)
+        thumbnail = thumbnails.lookup(self.post.image)
+        self.assertIsNotNone(thumbnail)
+        self.assertEqual((thumbnail.width, thumbnail.height), (960, 339))
+        response = ThumbnailTests.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, thumbnail.url)
+
+    def test_backfill_command(self):
+        out = StringIO()
+        call_command('backfill_thumbnails', workers=1, stdout=out)
+        self.assertIn('Создано миниатюр: 1', out.getvalue())
+        self.assertIsNotNone(thumbnails.lookup(self.post.image))
@@ -0,0 +1,217 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from tasks import worker
+from .. import timeline
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+        cls.author = User.objects.create_user(username='Author')
+
+    def feed_ids(self):
+        response = TimelineTests.user_client.get(
+            reverse('posts:follow_index')
+        )
+        return [post.id for post in response.context['page_obj']]
+
+    def test_post_fan_out(self):
+        Follow.objects.create(
+            user=TimelineTests.user,
+            author=TimelineTests.author
+        )
+        post = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=TimelineTests.author
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=TimelineTests.user,
+                post=post
+            ).exists()
+        )
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_follow_backfills_timeline(self):
+        post = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=TimelineTests.author
+        )
+        TimelineTests.user_client.get(
+            reverse(
+                'posts:profile_follow',
+                kwargs={'username': TimelineTests.author}
+            )
+        )
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_unfollow_and_delete_clean_timeline(self):
+        Follow.objects.create(
+            user=TimelineTests.user,
+            author=TimelineTests.author
+        )
+        post = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=TimelineTests.author
+        )
+        Post.objects.create(
+            text='Тестовый текст поста.',
+            author=TimelineTests.author
+        )
+        post.delete()
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=TimelineTests.user).count(), 1
+        )
+        TimelineTests.user_client.get(
+            reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': TimelineTests.author}
+            )
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=TimelineTests.user).exists()
+        )
+        self.assertEqual(self.feed_ids(), [])
+
+    @override_settings(TIMELINE_DEPTH=3)
+    def test_timeline_trimmed_to_depth(self):
+        Follow.objects.create(
+            user=TimelineTests.user,
+            author=TimelineTests.author
+        )
+        posts = [
+            Post.objects.create(
+                text='Тестовый текст поста.',
+                author=TimelineTests.author
+            ) for i in range(5)
+        ]
+        self.assertEqual(
+            list(
+                TimelineEntry.objects.filter(
+                    user=TimelineTests.user
+                ).values_list('post_id', flat=True)
+            ),
+            [post.id for post in posts[:-4:-1]]
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_pulled_author_merged_on_read(self):
+        Follow.objects.create(
+            user=TimelineTests.user,
+            author=TimelineTests.author
+        )
+        post = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=TimelineTests.author
+        )
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1, POSTS_PER_PAGE=2)
+    def test_pulled_author_merged_in_order(self):
+        pulled = User.objects.create_user(username='Pulled')
+        Follow.objects.create(user=pulled, author=TimelineTests.author)
+        for author in (TimelineTests.author, pulled):
+            Follow.objects.create(user=TimelineTests.user, author=author)
+        posts = [
+            Post.objects.create(
+                text='Тестовый текст поста.',
+                author=(TimelineTests.author, pulled)[i % 2]
+            ) for i in range(5)
+        ]
+        expected = [post.id for post in reversed(posts)]
+        pages = []
+        for page in (1, 2, 3):
+            response = TimelineTests.user_client.get(
+                reverse('posts:follow_index'), {'page': page}
+            )
+            pages += [post.id for post in response.context['page_obj']]
+        self.assertEqual(pages, expected)
+        with self.settings(POSTS_PAGINATION='cursor'):
+            pages, cursor = [], ''
+            while cursor is not None:
+                response = TimelineTests.user_client.get(
+                    reverse('posts:follow_index'), {'cursor': cursor}
+                )
+                page_obj = response.context['page_obj']
+                pages += [post.id for post in page_obj]
+                cursor = page_obj.next_cursor
+        self.assertEqual(pages, expected)
+
+    def test_fanned_out_posts_not_doubled_when_pulled(self):
+        Follow.objects.create(
+            user=TimelineTests.user,
+            author=TimelineTests.author
+        )
+        posts = [
+            Post.objects.create(
+                text='Тестовый текст поста.',
+                author=TimelineTests.author
+            ) for _ in range(3)
+        ]
+        expected = [post.id for post in reversed(posts)]
+        with self.settings(TIMELINE_FANOUT_LIMIT=0):
+            self.assertEqual(self.feed_ids(), expected)
+            self.assertEqual(timeline.feed(TimelineTests.user).count(), 3)
+
+    def entry_ids(self):
+        return sorted(
+            TimelineEntry.objects.filter(
+                user=TimelineTests.user
+            ).values_list('post_id', flat=True)
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_timelines_synced_when_author_crosses_limit(self):
+        Follow.objects.create(
+            user=TimelineTests.user,
+            author=TimelineTests.author
+        )
+        first = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=TimelineTests.author
+        )
+        other = User.objects.create_user(username='Other')
+        follow = Follow.objects.create(
+            user=other,
+            author=TimelineTests.author
+        )
+        worker.work(once=True)
+        self.assertEqual(self.entry_ids(), [])
+        second = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=TimelineTests.author
+        )
+        self.assertEqual(self.feed_ids(), [second.id, first.id])
+        follow.delete()
+        worker.work(once=True)
+        self.assertEqual(self.entry_ids(), [first.id, second.id])
+        self.assertEqual(self.feed_ids(), [second.id, first.id])
+
+    def test_rebuild_timelines_command(self):
+        Follow.objects.create(
+            user=TimelineTests.user,
+            author=TimelineTests.author
+        )
+        post = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=TimelineTests.author
+        )
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.entry_ids(), [post.id])
+        with self.settings(TIMELINE_FANOUT_LIMIT=0):
+            call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.entry_ids(), [])
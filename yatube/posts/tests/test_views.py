@@ -3,14 +3,14 @@ import tempfile
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase, override_settings
 
 from django.urls import reverse
 from django import forms
 
-from ..models import Post, Group, Follow
+from ..models import Comment, Post, Group, Follow
+from ..paginator import CursorPaginator
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -71,6 +71,91 @@ class PaginatorTest(TestCase):
                 )
 
 
+@override_settings(POSTS_PAGINATION='cursor')
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.user_client = Client()
+        cls.user_client.force_login(cls.user)
+        cls.count_posts_on_page = 10
+        cls.count_posts = 25
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Описание...'
+        )
+        posts = (
+            Post(
+                text='Тестовый текст поста.',
+                author=cls.user,
+                group=cls.group
+            ) for i in range(cls.count_posts)
+        )
+        Post.objects.bulk_create(posts, cls.count_posts)
+        Follow.objects.create(user=cls.user, author=cls.user)
+
+    def test_cursor_pages(self):
+        pages_paginator = [
+            reverse('posts:index'),
+            reverse(
+                'posts:group_list',
+                kwargs={'slug': CursorPaginatorTest.group.slug}
+            ),
+            reverse(
+                'posts:profile',
+                kwargs={'username': CursorPaginatorTest.user}
+            ),
+            reverse('posts:follow_index'),
+        ]
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        for page in pages_paginator:
+            with self.subTest(page=page):
+                seen = []
+                page_obj = CursorPaginatorTest.user_client.get(
+                    page
+                ).context['page_obj']
+                self.assertFalse(page_obj.has_previous())
+                seen += [post.id for post in page_obj]
+                while page_obj.has_next():
+                    page_obj = CursorPaginatorTest.user_client.get(
+                        page, {'cursor': page_obj.next_cursor}
+                    ).context['page_obj']
+                    self.assertTrue(page_obj.has_previous())
+                    seen += [post.id for post in page_obj]
+                self.assertEqual(seen, expected)
+                previous = CursorPaginatorTest.user_client.get(
+                    page, {'cursor': page_obj.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    [post.id for post in previous],
+                    expected[10:20]
+                )
+
+    def test_cursor_skips_count(self):
+        with self.assertNumQueries(1):
+            page_obj = CursorPaginator(
+                Post.objects.all(),
+                CursorPaginatorTest.count_posts_on_page
+            ).get_page()
+        self.assertEqual(len(page_obj), 10)
+
+    def test_invalid_cursor_returns_first_page(self):
+        response = CursorPaginatorTest.user_client.get(
+            reverse('posts:index'), {'cursor': 'broken'}
+        )
+        self.assertFalse(response.context['page_obj'].has_previous())
+        self.assertEqual(
+            len(response.context['page_obj']),
+            CursorPaginatorTest.count_posts_on_page
+        )
+
+
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostPagesTests(TestCase):
     @classmethod
@@ -236,23 +321,127 @@ class PostPagesTests(TestCase):
 
     def test_cache_index(self):
         post = Post.objects.create(
-            text='Тестовый текст поста.',
+            text='Новый пост в кэше.',
             author=PostPagesTests.user,
         )
         response = PostPagesTests.user_client.get(
             reverse('posts:index')
         )
+        self.assertContains(response, post.text)
         page = response.content
         post.delete()
         response = PostPagesTests.user_client.get(
             reverse('posts:index')
         )
-        self.assertEqual(page, response.content)
-        cache.clear()
-        response = PostPagesTests.user_client.get(
-            reverse('posts:index')
-        )
         self.assertNotEqual(page, response.content)
+        self.assertNotContains(response, post.text)
+
+    def test_cache_card_invalidated_by_comment(self):
+        url = reverse(
+            'posts:group_list',
+            kwargs={'slug': PostPagesTests.group.slug}
+        )
+        PostPagesTests.user_client.get(url)
+        Comment.objects.create(
+            post=PostPagesTests.post,
+            author=PostPagesTests.user,
+            text='Комментарий.'
+        )
+        response = PostPagesTests.user_client.get(url)
+        self.assertContains(response, 'Комментариев: 1')
+
+    @override_settings(POSTS_PER_PAGE=1)
+    def test_cache_varies_on_page(self):
+        post = Post.objects.create(
+            text='Новый пост в кэше.',
+            author=PostPagesTests.user,
+        )
+        first = PostPagesTests.user_client.get(reverse('posts:index'))
+        second = PostPagesTests.user_client.get(
+            reverse('posts:index') + '?page=2'
+        )
+        self.assertContains(first, post.text)
+        self.assertNotContains(second, post.text)
+        self.assertContains(second, PostPagesTests.post.text)
+
+
+@override_settings(COMMENTS_PER_PAGE=5)
+class CommentsPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.post = Post.objects.create(
+            text='Тестовый текст поста.',
+            author=cls.user
+        )
+        Comment.objects.bulk_create(
+            Comment(
+                post=cls.post,
+                author=cls.user,
+                text='Комментарий %s' % i
+            ) for i in range(12)
+        )
+        cls.expected = list(
+            Comment.objects.order_by('-created', '-id').values_list(
+                'id', flat=True
+            )
+        )
+
+    def test_post_detail_first_page(self):
+        response = CommentsPageTests.guest_client.get(
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': CommentsPageTests.post.id}
+            )
+        )
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.id for comment in comments],
+            CommentsPageTests.expected[:5]
+        )
+        self.assertContains(response, comments.next_cursor)
+
+    def test_comments_fragment(self):
+        url = reverse(
+            'posts:post_comments',
+            kwargs={'post_id': CommentsPageTests.post.id}
+        )
+        seen, cursor = [], None
+        while True:
+            response = CommentsPageTests.guest_client.get(
+                url, {'cursor': cursor} if cursor else {}
+            )
+            self.assertTemplateUsed(response, 'posts/includes/comments.html')
+            self.assertTemplateNotUsed(response, 'base.html')
+            comments = response.context['comments']
+            seen += [comment.id for comment in comments]
+            cursor = comments.next_cursor
+            if not cursor:
+                break
+        self.assertEqual(seen, CommentsPageTests.expected)
+
+    def test_comments_json(self):
+        response = CommentsPageTests.guest_client.get(
+            reverse(
+                'posts:post_comments',
+                kwargs={'post_id': CommentsPageTests.post.id}
+            ),
+            {'format': 'json'}
+        )
+        data = response.json()
+        self.assertEqual(
+            [comment['id'] for comment in data['comments']],
+            CommentsPageTests.expected[:5]
+        )
+        self.assertIsNotNone(data['next'])
+
+    def test_comments_unknown_post(self):
+        response = CommentsPageTests.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
 
 
 class FollowTests(TestCase):
@@ -0,0 +1,116 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from tasks.queue import enqueue
+from . import versions
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+class Backend(ThumbnailBackend):
+    """Бэкенд sorl, который умеет искать миниатюру, не создавая её."""
+
+    def get_options(self, source, options):
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def lookup(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        name = self._get_thumbnail_filename(
+            source, geometry_string, self.get_options(source, options)
+        )
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+    def create_file(self, file_, geometry_string, **options):
+        """Пишет файл миниатюры в хранилище, не трогая kvstore и базу."""
+        source = ImageFile(file_)
+        options = self.get_options(source, options)
+        thumbnail = ImageFile(
+            self._get_thumbnail_filename(source, geometry_string, options),
+            default.storage
+        )
+        if thumbnail.exists():
+            return
+        image = default.engine.get_image(source)
+        try:
+            options['image_info'] = default.engine.get_image_info(image)
+            source.set_size(default.engine.get_image_size(image))
+            self._create_thumbnail(image, geometry_string, options, thumbnail)
+        finally:
+            default.engine.cleanup(image)
+
+
+backend = Backend()
+
+
+def lookup(image):
+    """Готовая миниатюра поста или None, если её ещё не создали."""
+    if not image:
+        return None
+    return backend.lookup(image, GEOMETRY, **OPTIONS)
+
+
+def generate(name):
+    return backend.get_thumbnail(name, GEOMETRY, **OPTIONS)
+
+
+def schedule(post):
+    """Ставит создание миниатюры в очередь фоновых задач.
+
+    Задача пишется в транзакции сохранения поста и выполняется воркером
+    ``run_tasks`` после коммита. Имя файла служит ключом: повторное
+    сохранение с той же картинкой задачу не дублирует.
+    """
+    if post.image:
+        enqueue(
+            'posts.thumbnail', post.id, post.image.name,
+            key='thumbnail:%s' % post.image.name
+        )
+
+
+def _create_file(name):
+    try:
+        backend.create_file(name, GEOMETRY, **OPTIONS)
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s', name)
+        return False
+    return True
+
+
+def backfill(posts, workers):
+    """Создаёт недостающие миниатюры в пуле процессов.
+
+    Процессы только декодируют картинки и пишут файлы, а записи kvstore
+    делаются в текущем процессе. Возвращает пару (создано, с ошибкой)."""
+    missing = [(post.id, post.image.name) for post in posts
+               if not lookup(post.image)]
+    if not missing:
+        return 0, 0
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_create_file, [name for _, name in missing]))
+    created = []
+    for (post_id, name), ok in zip(missing, results):
+        if ok:
+            generate(name)
+            created.append(post_id)
+    versions.bump(*('post:%s' % post_id for post_id in created))
+    return len(created), len(missing) - len(created)
@@ -0,0 +1,253 @@
+import heapq
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from tasks.queue import enqueue
+from .models import Follow, Post, Profile, TimelineEntry
+
+TRIM_SQL = '''
+DELETE FROM {table} WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC
+        ) AS position
+        FROM {table} WHERE user_id IN ({users})
+    ) WHERE position > %s
+)
+'''
+
+REBUILD_SQL = '''
+INSERT INTO {timeline} (user_id, post_id, pub_date)
+SELECT user_id, post_id, pub_date FROM (
+    SELECT follow.user_id, post.id AS post_id, post.pub_date,
+        ROW_NUMBER() OVER (
+            PARTITION BY follow.user_id
+            ORDER BY post.pub_date DESC, post.id DESC
+        ) AS position
+    FROM {follow} AS follow
+    JOIN {post} AS post ON post.author_id = follow.author_id
+    JOIN {profile} AS profile ON profile.user_id = follow.author_id
+    WHERE profile.followers_count <= %s
+) WHERE position <= %s
+'''
+
+
+def is_pulled(author_id):
+    """Посты авторов с огромным числом подписчиков читаются при запросе."""
+    return Profile.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).exists()
+
+
+def pulled_authors(user):
+    return Follow.objects.filter(
+        user=user,
+        author__profile__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).values_list('author_id', flat=True)
+
+
+def trim(user_ids):
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    sql = TRIM_SQL.format(
+        table=TimelineEntry._meta.db_table,
+        users=', '.join(['%s'] * len(user_ids))
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, user_ids + [settings.TIMELINE_DEPTH])
+
+
+def fan_out(post):
+    if is_pulled(post.author_id):
+        return
+    followers = list(
+        Follow.objects.filter(
+            author_id=post.author_id
+        ).values_list('user_id', flat=True)
+    )
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers
+        ),
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    trim(followers)
+
+
+def backfill(user, author):
+    if is_pulled(author.id):
+        return
+    posts = Post.objects.filter(author=author).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:settings.TIMELINE_DEPTH]
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user=user, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts
+        ),
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    trim([user.id])
+
+
+def remove(user, author):
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def followers_changed(author_id, delta):
+    """Ставит пересборку лент, если автор пересёк TIMELINE_FANOUT_LIMIT.
+
+    Вызывается после сдвига счётчика подписчиков на ``delta`` (+1 или
+    -1), поэтому пересечение видно по точному значению счётчика.
+    """
+    count = Profile.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    if count == (limit + 1 if delta > 0 else limit):
+        enqueue('posts.sync_author_timelines', author_id)
+
+
+def sync_author(author_id):
+    """Приводит ленты подписчиков автора к его текущему режиму.
+
+    Посты автора, который стал читаться при запросе, убираются из лент;
+    посты автора, который снова раздаётся при записи, раскладываются
+    по лентам всех его подписчиков.
+    """
+    if is_pulled(author_id):
+        TimelineEntry.objects.filter(post__author_id=author_id).delete()
+        return
+    followers = list(
+        Follow.objects.filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True)
+    )
+    posts = list(
+        Post.objects.filter(author_id=author_id).order_by(
+            '-pub_date', '-id'
+        ).values_list('id', 'pub_date')[:settings.TIMELINE_DEPTH]
+    )
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for user_id in followers
+            for post_id, pub_date in posts
+        ),
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    trim(followers)
+
+
+def rebuild():
+    """Заново материализует ленты всех подписчиков одним запросом."""
+    TimelineEntry.objects.all().delete()
+    sql = REBUILD_SQL.format(
+        timeline=TimelineEntry._meta.db_table,
+        follow=Follow._meta.db_table,
+        post=Post._meta.db_table,
+        profile=Profile._meta.db_table
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql, [settings.TIMELINE_FANOUT_LIMIT, settings.TIMELINE_DEPTH]
+        )
+        return cursor.rowcount
+
+
+def timeline_seek(condition):
+    """Условие курсора по полям поста в полях записи ленты."""
+    children = [
+        timeline_seek(child) if isinstance(child, Q) else (
+            'post_' + child[0] if child[0].startswith('id__') else child[0],
+            child[1]
+        )
+        for child in condition.children
+    ]
+    return Q(
+        *children, _connector=condition.connector, _negated=condition.negated
+    )
+
+
+class Feed:
+    """Посты ленты подписок для Paginator и CursorPaginator.
+
+    Материализованная лента читается диапазоном по индексу
+    (user, pub_date, post), посты авторов, которые не раздаются при
+    записи, - по индексу (author, pub_date) отдельным запросом на
+    автора. Ключи (pub_date, id) сливаются в памяти, посты страницы
+    загружаются по id одним запросом.
+    """
+
+    model = Post
+    ordered = True
+
+    def __init__(self, user, pulled, condition=None, descending=True):
+        self.user = user
+        self.pulled = pulled
+        self.condition = condition
+        self.descending = descending
+
+    def filter(self, condition):
+        return Feed(self.user, self.pulled, condition, self.descending)
+
+    def order_by(self, *fields):
+        return Feed(
+            self.user, self.pulled, self.condition, fields[0].startswith('-')
+        )
+
+    def entries(self):
+        entries = TimelineEntry.objects.filter(user=self.user)
+        if self.pulled:
+            # Записи, разложенные до того, как автор стал читаться при
+            # запросе, и ещё не убранные sync_author: иначе пост дважды.
+            entries = entries.exclude(post__author_id__in=self.pulled)
+        return entries
+
+    def count(self):
+        return self.entries().count() + (
+            Post.objects.filter(author_id__in=self.pulled).count()
+            if self.pulled else 0
+        )
+
+    def sources(self):
+        sign = '-' if self.descending else ''
+        entries = self.entries()
+        if self.condition is not None:
+            entries = entries.filter(timeline_seek(self.condition))
+        yield entries.order_by(
+            sign + 'pub_date', sign + 'post_id'
+        ).values_list('pub_date', 'post_id')
+        for author_id in self.pulled:
+            posts = Post.objects.filter(author_id=author_id)
+            if self.condition is not None:
+                posts = posts.filter(self.condition)
+            yield posts.order_by(
+                sign + 'pub_date', sign + 'id'
+            ).values_list('pub_date', 'id')
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.stop is None:
+            raise TypeError('Ленту можно только срезать с концом.')
+        start, stop = index.start or 0, index.stop
+        keys = heapq.merge(
+            *(list(source[:stop]) for source in self.sources()),
+            reverse=self.descending
+        )
+        ids = [post_id for _, post_id in list(keys)[start:stop]]
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[post_id] for post_id in ids if post_id in posts]
+
+
+def feed(user):
+    """Лента подписок: материализованная лента плюс авторы, чьи посты
+    не раздаются при записи."""
+    return Feed(user, list(pulled_authors(user)))
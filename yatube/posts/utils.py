@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+
+from .paginator import CursorPaginator
+
+
+def paginate(request, queryset, per_page=None):
+    """Возвращает страницу в режиме, заданном POSTS_PAGINATION."""
+    per_page = per_page or settings.POSTS_PER_PAGE
+    if settings.POSTS_PAGINATION == 'cursor':
+        return CursorPaginator(queryset, per_page).get_page(
+            request.GET.get('cursor')
+        )
+    return Paginator(queryset, per_page).get_page(request.GET.get('page'))
+
+
+def comments_page(queryset, cursor=None):
+    """Страница комментариев от новых к старым по индексу created."""
+    return CursorPaginator(
+        queryset, settings.COMMENTS_PER_PAGE, ordering=('created', 'id')
+    ).get_page(cursor)
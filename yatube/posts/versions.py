@@ -0,0 +1,115 @@
+import time
+from hashlib import md5
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core import routers
+
+KEY = 'posts:version:%s'
+
+
+def new_stamp():
+    """Метка с моментом создания: '<время в hex>-<uuid>'."""
+    return '%x-%s' % (int(time.time()), uuid4().hex)
+
+
+def created(stamp):
+    head, separator, _ = stamp.partition('-')
+    return int(head, 16) if separator else 0
+
+
+def get(*scopes):
+    """Возвращает метки версий областей кэша, создавая недостающие.
+
+    Метка меняется при каждом изменении области, поэтому фрагменты
+    со старой меткой в ключе больше не читаются и истекать им не нужно.
+
+    Реплика может отставать от основной базы до ``REPLICA_PIN_SECONDS``.
+    Пока метка моложе этого, запрос, читающий с реплики, получает
+    одноразовую метку: отрисованное им по старым данным не попадёт в
+    кэш под настоящей меткой.
+    """
+    keys = [KEY % scope for scope in scopes]
+    stamps = cache.get_many(keys)
+    missing = {key: new_stamp() for key in keys if key not in stamps}
+    if missing:
+        cache.set_many(missing, None)
+        stamps.update(missing)
+    if routers.reads_replica():
+        settled = time.time() - settings.REPLICA_PIN_SECONDS
+        for key, stamp in stamps.items():
+            if created(stamp) > settled:
+                stamps[key] = uuid4().hex
+    return [stamps[key] for key in keys]
+
+
+def bump(*scopes):
+    """Сбрасывает метки областей сразу и ещё раз после коммита.
+
+    Запрос, прочитавший данные до коммита, мог создать новую метку и
+    закэшировать под ней старую страницу навсегда: повторный сброс после
+    коммита делает такую запись недостижимой.
+    """
+    drop(scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: drop(scopes))
+
+
+def drop(scopes):
+    cache.delete_many([KEY % scope for scope in scopes])
+    if hasattr(cache, 'invalidate_tags'):
+        # Записи со старой версией уже не прочитают, освобождаем место.
+        cache.invalidate_tags(*scopes)
+
+
+def set_tagged(key, value, scopes):
+    """Кладёт в кэш навсегда, помечая тегами областей, если бэкенд умеет."""
+    if hasattr(cache, 'invalidate_tags'):
+        cache.set(key, value, None, tags=scopes)
+    else:
+        cache.set(key, value, None)
+
+
+def post_scopes(post):
+    scopes = ['index', 'author:%s' % post.author_id]
+    if post.group_id:
+        scopes.append('group:%s' % post.group_id)
+    return scopes
+
+
+def page_context(page_obj, scope=None):
+    """Проставляет постам страницы cache_version для кэша карточек.
+
+    Версия списка складывается из версии области и версий карточек,
+    так что правка поста или новый комментарий обновляют и список.
+    """
+    posts = list(page_obj)
+    scopes = ['post:%s' % post.id for post in posts]
+    stamps = get(*scopes + ([scope] if scope else []))
+    for post, stamp in zip(posts, stamps):
+        post.cache_version = stamp
+    if not scope:
+        return {}
+    return {
+        'cache_scope': scope,
+        'cache_page': getattr(page_obj, 'number', None) or (
+            page_obj.previous_cursor, page_obj.next_cursor
+        ),
+        'cache_version': ':'.join(stamps),
+    }
+
+
+def etag(request, *scopes):
+    """ETag страницы: версии её областей, пользователь и параметры."""
+    user = request.user
+    parts = [
+        request.resolver_match.view_name if request.resolver_match else '',
+        str(user.pk) if user.is_authenticated else 'anonymous',
+        request.GET.urlencode(),
+        settings.POSTS_PAGINATION,
+        *get(*scopes),
+    ]
+    return md5(':'.join(parts).encode()).hexdigest()
@@ -1,67 +1,152 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect, render
-
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+from core.routers import pin_primary
+from core.sqlite import retry_locked
+from core.throttle import throttle
+from . import etags
+from . import search as post_search
+from . import follows, pages, thumbnails, timeline, versions
 from .forms import PostForm, CommentForm
-from .models import Group, Post, Follow, User
+from .models import Comment, Group, Post, Follow, User
+from .utils import comments_page, paginate
 
 
+@vary_on_cookie
+@condition(etag_func=etags.index)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.select_related('author', 'group')
+    page_obj = paginate(request, post_list)
     context = {
         'page_obj': page_obj,
+        **versions.page_context(page_obj, 'index'),
     }
     return render(request, 'posts/index.html', context)
 
 
+@vary_on_cookie
+@condition(etag_func=etags.group_posts)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = group.posts.select_related('author', 'group')
+    page_obj = paginate(request, post_list)
     context = {
         'group': group,
         'page_obj': page_obj,
+        **versions.page_context(page_obj, 'group:%s' % group.id),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@vary_on_cookie
+@condition(etag_func=etags.profile)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    user = request.user
-    following = user.is_authenticated and Follow.objects.filter(
-        user=user,
-        author=author
-    ).exists()
+    author = get_object_or_404(
+        User.objects.select_related('profile'),
+        username=username
+    )
+    post_list = author.posts.select_related('author', 'group')
+    page_obj = paginate(request, post_list)
+    following = follows.is_following(request.user, author.id)
     context = {
         'author': author,
         'page_obj': page_obj,
-        'following': following
+        'following': following,
+        **versions.page_context(page_obj, 'author:%s' % author.id),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    post_list = post_search.search(
+        Post.objects.select_related('author', 'group'),
+        query
+    )
+    page_obj = Paginator(post_list, settings.POSTS_PER_PAGE).get_page(
+        request.GET.get('page')
+    )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_params': urlencode({'q': query}) + '&',
+        **versions.page_context(page_obj),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@vary_on_cookie
+@condition(etag_func=etags.post_detail)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    """Страница поста из кэша.
+
+    Гостям отдаётся закэшированный ответ целиком, вошедшим - закэшированное
+    тело с формой комментария, отрисованной под запрос.
+    """
+    scopes = pages.detail_scopes(request, post_id)
+    if scopes is None:
+        raise Http404
+    version = pages.detail_version(scopes)
+    anonymous = not request.user.is_authenticated
+    if anonymous:
+        content = pages.cached_response(post_id, version)
+        if content is not None:
+            return HttpResponse(content)
+    page = pages.body(post_id, scopes, version)
+    if page is None:
+        raise Http404
+    response = render(request, 'posts/post_detail.html', {
+        'post_text': page['post_text'],
+        'body': mark_safe(
+            pages.fill_comment_form(request, post_id, page['body'])
+        ),
+    })
+    if anonymous:
+        pages.store_response(
+            post_id, scopes, version, response.content
+        )
+    return response
+
+
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('id'), pk=post_id)
+    comments = comments_page(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        request.GET.get('cursor')
+    )
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created,
+                } for comment in comments
+            ],
+            'next': comments.next_cursor,
+        })
     context = {
-        'post': post,
-        'form': CommentForm(),
-        'comments': comments
+        'comments': comments,
+        'post_id': post_id,
     }
-    return render(request, 'posts/post_detail.html', context)
+    return render(request, 'posts/includes/comments.html', context)
 
 
 @login_required
+@throttle('posts')
+@retry_locked
+@transaction.atomic
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -74,10 +159,14 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    thumbnails.schedule(post)
     return redirect('posts:profile', post.author)
 
 
 @login_required
+@throttle('posts')
+@retry_locked
+@transaction.atomic
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
@@ -93,11 +182,19 @@ def post_edit(request, post_id):
             'posts/create_post.html',
             {'form': form, 'is_edit': True}
         )
-    form.save()
+    # Только изменённые поля: comments_count в загруженном посте мог
+    # устареть, пока пользователь редактировал текст.
+    post = form.save(commit=False)
+    post.save(update_fields=form.changed_data)
+    if 'image' in form.changed_data:
+        thumbnails.schedule(post)
     return redirect('posts:post_detail', post_id)
 
 
 @login_required
+@throttle('comments')
+@retry_locked
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -112,31 +209,32 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     user = request.user
-    post_list = Post.objects.filter(
-        author__following__user=user
-    )
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, timeline.feed(user))
     context = {
         'page_obj': page_obj,
+        **versions.page_context(page_obj),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@pin_primary
+@throttle('follows', methods=('GET', 'POST'))
+@retry_locked
+@transaction.atomic
 def profile_follow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
-    if user != author and not author.following.filter(user=user).exists():
-        Follow.objects.create(
-            user=user,
-            author=author
-        )
+    if user != author and not follows.is_following(user, author.id):
+        Follow.objects.get_or_create(user=user, author=author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@pin_primary
+@throttle('follows', methods=('GET', 'POST'))
+@retry_locked
+@transaction.atomic
 def profile_unfollow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
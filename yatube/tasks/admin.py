@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'created'
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'key')
+
+
+admin.site.register(Task, TaskAdmin)
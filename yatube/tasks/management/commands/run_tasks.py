@@ -0,0 +1,47 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import routers
+from tasks.worker import work
+
+
+class Command(BaseCommand):
+    help = 'Воркер фоновых задач из очереди в базе.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=settings.TASKS_BATCH_SIZE,
+            help='Сколько задач забирать за одну выборку.'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=settings.TASKS_POLL_INTERVAL,
+            help='Пауза в секундах между проверками пустой очереди.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить накопившиеся задачи и выйти.'
+        )
+
+    def handle(self, *args, **options):
+        stop = []
+
+        def request_stop(signum, frame):
+            # Текущая выборка доделывается, новая не начинается.
+            stop.append(signum)
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        # Задачи читают только что записанное, реплики могут отставать.
+        routers.pin()
+        try:
+            processed = work(
+                options['batch'], options['poll'], options['once'],
+                stopping=lambda: bool(stop)
+            )
+        finally:
+            routers.unpin()
+        self.stdout.write(
+            self.style.SUCCESS('Обработано задач: %s' % processed)
+        )
@@ -0,0 +1,48 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Task
+
+# Имя задачи -> функция. Заполняется декоратором task при импорте
+# модулей tasks.py приложений (см. TasksConfig.ready).
+registry = {}
+
+
+def task(name, max_attempts=None):
+    """Регистрирует функцию как фоновую задачу ``name``.
+
+    Аргументы задачи проходят через JSON, поэтому передаются id и имена,
+    а не объекты моделей.
+    """
+    def decorator(function):
+        function.task_name = name
+        function.max_attempts = max_attempts
+        registry[name] = function
+        return function
+    return decorator
+
+
+def enqueue(name, *args, key=None, delay=0, **kwargs):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    Воркер увидит строку только после коммита, а при откате она пропадёт
+    вместе с остальными изменениями. Задача с ключом ``key``, который уже
+    есть в очереди или среди выполненных, повторно не добавляется.
+    """
+    function = registry.get(name)
+    if function is None:
+        raise LookupError('Неизвестная задача %r' % name)
+    Task.objects.bulk_create([
+        Task(
+            name=name,
+            payload=json.dumps({'args': args, 'kwargs': kwargs}),
+            key=key,
+            max_attempts=(
+                function.max_attempts or settings.TASKS_MAX_ATTEMPTS
+            ),
+            run_at=timezone.now() + timedelta(seconds=delay)
+        )
+    ], ignore_conflicts=True)
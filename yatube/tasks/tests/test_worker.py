@@ -0,0 +1,115 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Task
+from ..queue import enqueue, task
+from ..worker import claim, purge, run_batch, work
+
+calls = []
+
+
+@task('tests.record')
+def record(*args, **kwargs):
+    calls.append((args, kwargs))
+
+
+@task('tests.fail', max_attempts=2)
+def fail():
+    raise ValueError('сбой')
+
+
+@override_settings(TASKS_RETRY_DELAY=10, TASKS_RETRY_MAX_DELAY=60)
+class WorkerTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        enqueue('tests.record', 1, 'два', flag=True)
+        self.assertEqual(run_batch(), 1)
+        self.assertEqual(calls, [((1, 'два'), {'flag': True})])
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual(task.attempts, 1)
+        self.assertEqual(run_batch(), 0)
+
+    def test_unknown_task_rejected(self):
+        with self.assertRaises(LookupError):
+            enqueue('tests.missing')
+
+    def test_idempotency_key(self):
+        for _ in range(3):
+            enqueue('tests.record', key='once')
+        self.assertEqual(Task.objects.count(), 1)
+        work(once=True)
+        enqueue('tests.record', key='once')
+        self.assertEqual(work(once=True), 0)
+        self.assertEqual(len(calls), 1)
+
+    def test_rolled_back_with_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                enqueue('tests.record')
+                raise RuntimeError
+        self.assertFalse(Task.objects.exists())
+
+    def test_delayed_task_waits(self):
+        enqueue('tests.record', delay=60)
+        self.assertEqual(run_batch(), 0)
+
+    def test_batched_claim(self):
+        for i in range(5):
+            enqueue('tests.record', i)
+        with self.assertNumQueries(2):
+            tasks = claim(3)
+        self.assertEqual([task.attempts for task in tasks], [1, 1, 1])
+        self.assertEqual(len({task.claim for task in tasks}), 1)
+        self.assertEqual(len(claim(3)), 2)
+        self.assertEqual(claim(3), [])
+
+    @mock.patch('tasks.worker.random.uniform', return_value=1)
+    def test_retry_with_backoff_then_fail(self, uniform):
+        enqueue('tests.fail')
+        before = timezone.now()
+        run_batch()
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertIn('ValueError', task.last_error)
+        self.assertGreaterEqual(task.run_at, before + timedelta(seconds=10))
+        Task.objects.update(run_at=timezone.now())
+        run_batch()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+
+    @override_settings(TASKS_LEASE=60)
+    def test_abandoned_task_reclaimed(self):
+        enqueue('tests.record')
+        stale = claim(1)[0]
+        Task.objects.update(locked_at=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(run_batch(), 1)
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertNotEqual(task.claim, stale.claim)
+
+    @override_settings(TASKS_RETENTION=60)
+    def test_purge(self):
+        enqueue('tests.record', key='old')
+        enqueue('tests.record', key='new')
+        work(once=True)
+        Task.objects.filter(key='old').update(
+            run_at=timezone.now() - timedelta(minutes=2)
+        )
+        self.assertEqual(purge(), 1)
+        self.assertEqual(Task.objects.get().key, 'new')
+
+    def test_command(self):
+        enqueue('tests.record')
+        out = StringIO()
+        call_command('run_tasks', once=True, stdout=out)
+        self.assertIn('Обработано задач: 1', out.getvalue())
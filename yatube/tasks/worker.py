@@ -0,0 +1,146 @@
+import json
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.sqlite import retry_locked
+from .models import Task
+from .queue import registry
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 60
+
+
+@retry_locked
+def claim(batch):
+    """Забирает до ``batch`` готовых задач одним UPDATE.
+
+    Вместе с очередью забираются задачи, чей воркер не отчитался
+    за ``TASKS_LEASE`` секунд, - скорее всего, он упал. Каждая выборка
+    получает свою метку: два воркера не получат одну задачу, а опоздавший
+    воркер не перезапишет результат нового.
+    """
+    now = timezone.now()
+    token = uuid4().hex
+    due = Task.objects.filter(
+        Q(status=Task.QUEUED, run_at__lte=now)
+        | Q(
+            status=Task.RUNNING,
+            locked_at__lt=now - timedelta(seconds=settings.TASKS_LEASE)
+        )
+    ).order_by('run_at', 'id').values('id')[:batch]
+    claimed = Task.objects.filter(id__in=due).update(
+        status=Task.RUNNING,
+        claim=token,
+        locked_at=now,
+        attempts=F('attempts') + 1
+    )
+    if not claimed:
+        return []
+    return list(Task.objects.filter(claim=token).order_by('run_at', 'id'))
+
+
+def retry_delay(attempt):
+    """Экспоненциальная задержка повтора со случайным разбросом."""
+    delay = min(
+        settings.TASKS_RETRY_DELAY * 2 ** (attempt - 1),
+        settings.TASKS_RETRY_MAX_DELAY
+    )
+    return delay * random.uniform(0.5, 1.5)
+
+
+def execute(task):
+    function = registry.get(task.name)
+    if function is None:
+        raise LookupError('Неизвестная задача %r' % task.name)
+    payload = json.loads(task.payload)
+    function(*payload['args'], **payload['kwargs'])
+
+
+def failed(task, error):
+    if task.attempts >= task.max_attempts:
+        logger.error('Задача %s не выполнена: %s', task, error)
+        return {'status': Task.FAILED, 'last_error': error}
+    logger.warning('Задача %s упала, повтор: %s', task, error)
+    return {
+        'status': Task.QUEUED,
+        'last_error': error,
+        'run_at': timezone.now() + timedelta(
+            seconds=retry_delay(task.attempts)
+        ),
+    }
+
+
+def run_batch(batch=None):
+    """Выполняет одну выборку задач, возвращает их число."""
+    tasks = claim(batch or settings.TASKS_BATCH_SIZE)
+    done = []
+    for task in tasks:
+        if task.attempts > task.max_attempts:
+            # Воркер упал на последней попытке и не успел отчитаться.
+            update_failed(task, 'Попытки исчерпаны')
+            continue
+        try:
+            execute(task)
+        except Exception:
+            update_failed(task, traceback.format_exc())
+        else:
+            done.append(task.pk)
+    if done:
+        mark_done(done, tasks[0].claim)
+    return len(tasks)
+
+
+@retry_locked
+def mark_done(ids, token):
+    """Успешные задачи выборки отмечаются одним запросом."""
+    Task.objects.filter(pk__in=ids, claim=token).update(
+        status=Task.DONE, last_error=''
+    )
+
+
+@retry_locked
+def update_failed(task, error):
+    Task.objects.filter(pk=task.pk, claim=task.claim).update(
+        **failed(task, error)
+    )
+
+
+def purge():
+    """Удаляет выполненные задачи старше ``TASKS_RETENTION`` секунд."""
+    cutoff = timezone.now() - timedelta(seconds=settings.TASKS_RETENTION)
+    deleted, _ = Task.objects.filter(
+        status=Task.DONE, run_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def work(batch=None, poll=None, once=False, stopping=lambda: False):
+    """Цикл воркера: выборки подряд, пока есть задачи, затем ожидание.
+
+    С ``once`` выходит, когда очередь опустела. Возвращает число
+    обработанных задач.
+    """
+    poll = settings.TASKS_POLL_INTERVAL if poll is None else poll
+    processed = 0
+    next_purge = 0
+    while not stopping():
+        count = run_batch(batch)
+        processed += count
+        if count:
+            continue
+        if once:
+            break
+        if time.monotonic() >= next_purge:
+            purge()
+            next_purge = time.monotonic() + PURGE_INTERVAL
+        time.sleep(poll)
+    return processed
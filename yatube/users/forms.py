@@ -1,6 +1,7 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
 
+from tasks.queue import enqueue
 
 User = get_user_model()
 
@@ -9,3 +10,26 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Сброс пароля, письмо которого отправляет воркер фоновых задач."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        enqueue(
+            'users.password_reset_email',
+            context['user'].pk,
+            {
+                name: context[name]
+                for name in ('email', 'domain', 'site_name', 'protocol')
+            },
+            {
+                'subject': subject_template_name,
+                'email': email_template_name,
+                'html': html_email_template_name,
+            },
+            from_email,
+            to_email
+        )
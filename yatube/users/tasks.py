@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from tasks.queue import task
+
+User = get_user_model()
+
+
+@task('users.password_reset_email')
+def password_reset_email(user_id, context, templates, from_email, to_email):
+    """Письмо со ссылкой сброса пароля.
+
+    Токен создаётся здесь, а не при постановке в очередь, чтобы ссылка
+    не хранилась в таблице задач.
+    """
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    context = dict(
+        context,
+        user=user,
+        uid=urlsafe_base64_encode(force_bytes(user.pk)),
+        token=default_token_generator.make_token(user),
+    )
+    subject = ''.join(
+        loader.render_to_string(templates['subject'], context).splitlines()
+    )
+    message = EmailMultiAlternatives(
+        subject,
+        loader.render_to_string(templates['email'], context),
+        from_email,
+        [to_email]
+    )
+    if templates.get('html'):
+        message.attach_alternative(
+            loader.render_to_string(templates['html'], context), 'text/html'
+        )
+    message.send()
@@ -1,7 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from tasks import worker
+from tasks.models import Task
+
 User = get_user_model()
 
 
@@ -26,3 +31,24 @@ class UserFormTests(TestCase):
             data=from_data
         )
         self.assertNotEqual(User.objects.count(), user_count)
+
+    def test_password_reset_email_sent_by_worker(self):
+        user = User.objects.create_user(
+            username='Reset', email='reset@yandex.by', password='x'
+        )
+        response = UserFormTests.guest_client.post(
+            reverse('users:password_reset'),
+            data={'email': user.email}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        task = Task.objects.get(name='users.password_reset_email')
+        self.assertNotIn(
+            default_token_generator.make_token(user), task.payload
+        )
+        worker.work(once=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [user.email])
+        self.assertIn(
+            default_token_generator.make_token(user), mail.outbox[0].body
+        )
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'about.apps.AboutConfig',
     'core.apps.CoreConfig',
+    'tasks.apps.TasksConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -47,7 +48,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -69,10 +74,18 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.templates.DjangoTemplates',
+        'NAME': 'django',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Скомпилированные шаблоны кэшируются и при DEBUG = True:
+            # после правки шаблона нужен перезапуск сервера.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -86,6 +99,8 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+TEST_RUNNER = 'core.test_runner.CacheClearingRunner'
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 # Database
@@ -95,9 +110,58 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живёт между запросами, а не открывается на каждый.
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            # busy_timeout в секундах: ждать освобождения блокировки
+            # записи вместо немедленного "database is locked".
+            'timeout': 20,
+        },
+        # Выполняются на каждом новом соединении (core.sqlite.configure).
+        # WAL не блокирует читателей на время записи, synchronous=NORMAL
+        # в WAL теряет при сбое питания только последние транзакции, но не
+        # портит базу.
+        'PRAGMAS': {
+            'journal_mode': 'wal',
+            'synchronous': 'normal',
+            'cache_size': -20000,
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'memory',
+        },
     }
 }
 
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+# Алиасы из DATABASES, с которых читают страницы. Пустой список -
+# всё идёт на default (пример с двумя файлами - yatube/settings_replica.py).
+DATABASE_REPLICAS = []
+# После запроса на запись чтение клиента столько секунд остаётся
+# на основной базе, чтобы он увидел свои изменения до репликации.
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'pin_primary'
+# Запись, упавшая с "database is locked", повторяется до DB_WRITE_RETRIES
+# раз с экспоненциальной задержкой от DB_WRITE_RETRY_DELAY секунд.
+DB_WRITE_RETRIES = 5
+DB_WRITE_RETRY_DELAY = 0.05
+# Лимиты записи на клиента (см. core.throttle): "число/период", период
+# s, m, h или d. Считаются отдельно по IP и по пользователю.
+RATE_LIMITS = {
+    'posts': '10/m',
+    'comments': '20/m',
+    'follows': '30/m',
+    'signup': '5/h',
+}
+# Адрес клиента за обратными прокси: заголовок META, который они
+# дополняют (например, 'HTTP_X_FORWARDED_FOR'), и число своих прокси
+# перед приложением. Берётся адрес, добавленный самым дальним из них;
+# всё левее мог подставить сам клиент. None - только REMOTE_ADDR.
+RATE_LIMIT_CLIENT_IP_HEADER = None
+RATE_LIMIT_TRUSTED_PROXIES = 1
+# Одновременных запросов на запись в одном процессе. Остальные сразу
+# получают 503 с Retry-After через WRITE_SHED_RETRY_AFTER секунд.
+WRITE_CONCURRENCY = 4
+WRITE_SHED_RETRY_AFTER = 2
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -132,9 +196,15 @@ USE_L10N = True
 USE_TZ = True
 
 # Cache
+# Файл SQLite общий для всех процессов сервера: попадания и сброс версий
+# видны каждому воркеру. core.cache.LocMemCache - кэш в памяти процесса.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'default.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
     }
 }
 
@@ -143,11 +213,99 @@ CACHES = {
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Загруженные файлы отдаёт core.views.media_file, только из этих
+# каталогов MEDIA_ROOT: картинки постов и миниатюры sorl.
+MEDIA_PUBLIC_DIRS = ('posts', 'cache')
+MEDIA_CACHE_SECONDS = 30 * 24 * 60 * 60
+# 'X-Sendfile' (Apache, lighttpd) или 'X-Accel-Redirect' (nginx):
+# передачу файла берёт на себя фронтенд-сервер. None - Django сам
+# отдаёт файл кусками. Для nginx MEDIA_ACCEL_REDIRECT_PREFIX - internal
+# location с alias на MEDIA_ROOT.
+MEDIA_SENDFILE_HEADER = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
 
 STATIC_URL = '/static/'
+# collectstatic собирает сюда файлы с хэшем содержимого в имени и их
+# сжатые копии .gz и .br (пакет Brotli из requirements.txt; без него
+# пишутся и отдаются только .gz). В продакшене их
+# отдаёт core.staticfiles.StaticFilesApplication из yatube.wsgi
+# с кэшированием на год.
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
+# Posts
+POSTS_PER_PAGE = 10
+# 'page' - постраничная навигация с номерами страниц,
+# 'cursor' - keyset-пагинация по (pub_date, id) без COUNT(*) и OFFSET.
+POSTS_PAGINATION = 'page'
+COMMENTS_PER_PAGE = 20
+# Глубина материализованной ленты подписок на пользователя.
+TIMELINE_DEPTH = 800
+# Посты авторов, у которых подписчиков больше, не раздаются по лентам
+# при публикации, а подмешиваются при чтении.
+TIMELINE_FANOUT_LIMIT = 1000
+# Сколько секунд кэш хранит набор подписок пользователя. Подписка
+# и отписка сбрасывают его сразу, срок - страховка от расхождений.
+FOLLOWING_CACHE_TIMEOUT = 24 * 60 * 60
+# Загруженные картинки постов уменьшаются до этого размера, лишаются
+# метаданных и пересжимаются с заданным качеством.
+POST_IMAGE_MAX_SIZE = (1920, 1920)
+POST_IMAGE_QUALITY = 85
+# Картинки с большим числом пикселей отклоняются как decompression bomb.
+POST_IMAGE_MAX_PIXELS = 40_000_000
+
+# Очередь фоновых задач в базе (приложение tasks), воркер:
+# python manage.py run_tasks. Выборка забирает до TASKS_BATCH_SIZE задач,
+# пустая очередь проверяется раз в TASKS_POLL_INTERVAL секунд.
+TASKS_BATCH_SIZE = 20
+TASKS_POLL_INTERVAL = 1
+# Упавшая задача повторяется до TASKS_MAX_ATTEMPTS раз с задержкой
+# TASKS_RETRY_DELAY * 2**попытка, но не больше TASKS_RETRY_MAX_DELAY секунд.
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 5
+TASKS_RETRY_MAX_DELAY = 10 * 60
+# Задача, которую воркер держит дольше, считается брошенной и выдаётся
+# снова. Выполненные задачи и их ключи хранятся TASKS_RETENTION секунд.
+TASKS_LEASE = 5 * 60
+TASKS_RETENTION = 7 * 24 * 60 * 60
+
+# Запросы к базе дольше порога (в секундах) пишутся в SLOW_QUERY_LOG
+# строками JSON вместе с планом запроса. None - журнал выключен.
+# Сводка: python manage.py slow_queries
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.jsonl')
+# Писать ли параметры запросов. В них бывают пароли, ключи сессий и
+# тексты пользователей: где журнал читают посторонние, выключите.
+SLOW_QUERY_LOG_PARAMS = True
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
@@ -0,0 +1,33 @@
+"""
+Основная база и реплика в двух файлах SQLite.
+
+Репликацию изображает команда ``sync_replica``, копирующая основную базу
+в файл реплики. Запуск:
+
+    python manage.py migrate --settings=yatube.settings_replica
+    python manage.py sync_replica --settings=yatube.settings_replica
+    python manage.py runserver --settings=yatube.settings_replica
+
+Тесты маршрутизации на двух файлах:
+
+    python manage.py test core --settings=yatube.settings_replica
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],
+        'TEST': {'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3')},
+    },
+    'replica': {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+        'TEST': {'NAME': os.path.join(BASE_DIR, 'test_db_replica.sqlite3')},
+    },
+}
+
+DATABASE_REPLICAS = ['replica']
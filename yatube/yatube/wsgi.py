@@ -13,4 +13,7 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
-application = get_wsgi_application()
+# Импорт после настройки Django: обёртка читает settings и манифест.
+from core.staticfiles import StaticFilesApplication  # noqa: E402
+
+application = StaticFilesApplication(get_wsgi_application())